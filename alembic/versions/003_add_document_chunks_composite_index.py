@@ -0,0 +1,40 @@
+"""add composite (document_id, chunk_index) index on document chunks
+
+Revision ID: 003
+Revises: 002
+Create Date: 2025-11-05 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Chunks are always read by document in chunk order, so one composite
+    # index serves both the filter and the ORDER BY. Build it CONCURRENTLY so
+    # writes to document_chunks are not blocked; that cannot run inside the
+    # migration transaction.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_document_chunks_document_id_chunk_index',
+            'document_chunks',
+            ['document_id', 'chunk_index'],
+            postgresql_concurrently=True
+        )
+    
+    # The composite index covers document_id lookups, and the primary key
+    # already provides a unique index on id
+    op.drop_index('ix_document_chunks_document_id', 'document_chunks')
+    op.drop_index('ix_document_chunks_id', 'document_chunks')
+
+
+def downgrade():
+    op.create_index('ix_document_chunks_id', 'document_chunks', ['id'])
+    op.create_index('ix_document_chunks_document_id', 'document_chunks', ['document_id'])
+    op.drop_index('ix_document_chunks_document_id_chunk_index', 'document_chunks')
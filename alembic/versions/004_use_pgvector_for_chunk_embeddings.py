@@ -0,0 +1,42 @@
+"""store chunk embeddings as pgvector vectors with an HNSW index
+
+Revision ID: 004
+Revises: 003
+Create Date: 2025-11-05 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+# Dimension of the Gemini embedding-001 vectors
+EMBEDDING_DIM = 768
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    
+    # JSON arrays share the textual '[x, y, ...]' form of vector literals
+    op.execute(
+        f"ALTER TABLE document_chunks ALTER COLUMN embedding TYPE vector({EMBEDDING_DIM}) "
+        "USING (embedding::text::vector)"
+    )
+    
+    # Approximate nearest-neighbour index for cosine distance searches
+    op.execute(
+        "CREATE INDEX ix_document_chunks_embedding_hnsw ON document_chunks "
+        "USING hnsw (embedding vector_cosine_ops)"
+    )
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_document_chunks_embedding_hnsw")
+    op.execute(
+        "ALTER TABLE document_chunks ALTER COLUMN embedding TYPE json "
+        "USING (embedding::text::json)"
+    )
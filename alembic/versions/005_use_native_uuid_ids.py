@@ -0,0 +1,75 @@
+"""store ids and document foreign keys as native UUID
+
+Revision ID: 005
+Revises: 004
+Create Date: 2025-11-05 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+# (table, column) pairs holding UUIDs, referenced table first
+UUID_COLUMNS = [
+    ('documents', 'id'),
+    ('extraction_results', 'id'),
+    ('extraction_results', 'document_id'),
+    ('document_chunks', 'id'),
+    ('document_chunks', 'document_id'),
+]
+
+# Foreign keys onto documents.id; 001/002 created them under these names
+FOREIGN_KEYS = [
+    ('extraction_results', 'extraction_results_document_id_fkey'),
+    ('extraction_results', 'fk_extraction_results_document_id'),
+    ('document_chunks', 'document_chunks_document_id_fkey'),
+]
+
+
+def _drop_foreign_keys():
+    for table, name in FOREIGN_KEYS:
+        op.execute(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {name}")
+
+
+def _create_foreign_keys():
+    op.create_foreign_key(
+        'extraction_results_document_id_fkey',
+        'extraction_results', 'documents',
+        ['document_id'], ['id'],
+        ondelete='CASCADE'
+    )
+    op.create_foreign_key(
+        'document_chunks_document_id_fkey',
+        'document_chunks', 'documents',
+        ['document_id'], ['id'],
+        ondelete='CASCADE'
+    )
+
+
+def upgrade():
+    # Column types on both sides of a foreign key must change together,
+    # so the constraints are dropped and recreated around the conversion
+    _drop_foreign_keys()
+    
+    for table, column in UUID_COLUMNS:
+        op.execute(
+            f"ALTER TABLE {table} ALTER COLUMN {column} TYPE uuid USING {column}::uuid"
+        )
+    
+    _create_foreign_keys()
+
+
+def downgrade():
+    _drop_foreign_keys()
+    
+    for table, column in UUID_COLUMNS:
+        op.execute(
+            f"ALTER TABLE {table} ALTER COLUMN {column} TYPE varchar USING {column}::text"
+        )
+    
+    _create_foreign_keys()
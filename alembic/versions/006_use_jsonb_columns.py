@@ -0,0 +1,36 @@
+"""store JSON columns as JSONB
+
+Revision ID: 006
+Revises: 005
+Create Date: 2025-11-05 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+JSON_COLUMNS = [
+    ('documents', 'document_metadata'),
+    ('extraction_results', 'parties'),
+    ('extraction_results', 'liability_cap'),
+    ('extraction_results', 'signatories'),
+]
+
+
+def upgrade():
+    for table, column in JSON_COLUMNS:
+        op.execute(
+            f"ALTER TABLE {table} ALTER COLUMN {column} TYPE jsonb USING {column}::jsonb"
+        )
+
+
+def downgrade():
+    for table, column in JSON_COLUMNS:
+        op.execute(
+            f"ALTER TABLE {table} ALTER COLUMN {column} TYPE json USING {column}::json"
+        )
@@ -0,0 +1,30 @@
+"""add embedding cache table
+
+Revision ID: 007
+Revises: 006
+Create Date: 2025-11-06 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'embedding_cache',
+        sa.Column('hash', sa.String(64), nullable=False),
+        sa.Column('model', sa.String(), nullable=False),
+        sa.Column('embedding', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('hash')
+    )
+
+
+def downgrade():
+    op.drop_table('embedding_cache')
@@ -0,0 +1,25 @@
+"""add persisted TF-IDF index to documents
+
+Revision ID: 008
+Revises: 007
+Create Date: 2025-11-06 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('documents', sa.Column('tfidf_vectorizer', sa.LargeBinary(), nullable=True))
+    op.add_column('documents', sa.Column('tfidf_matrix', sa.LargeBinary(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('documents', 'tfidf_matrix')
+    op.drop_column('documents', 'tfidf_vectorizer')
@@ -0,0 +1,39 @@
+"""store unit-length chunk embeddings and index them for inner product
+
+Revision ID: 009
+Revises: 008
+Create Date: 2025-11-06 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # New embeddings are normalized at ingestion; bring existing rows in line
+    op.execute(
+        "UPDATE document_chunks SET embedding = l2_normalize(embedding) "
+        "WHERE embedding IS NOT NULL"
+    )
+    
+    # On unit vectors the inner product equals cosine similarity and is cheaper
+    op.execute("DROP INDEX IF EXISTS ix_document_chunks_embedding_hnsw")
+    op.execute(
+        "CREATE INDEX ix_document_chunks_embedding_hnsw ON document_chunks "
+        "USING hnsw (embedding vector_ip_ops)"
+    )
+
+
+def downgrade():
+    # Normalized embeddings remain valid for cosine distance
+    op.execute("DROP INDEX IF EXISTS ix_document_chunks_embedding_hnsw")
+    op.execute(
+        "CREATE INDEX ix_document_chunks_embedding_hnsw ON document_chunks "
+        "USING hnsw (embedding vector_cosine_ops)"
+    )
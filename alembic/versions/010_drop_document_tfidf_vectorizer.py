@@ -0,0 +1,26 @@
+"""drop persisted TF-IDF vectorizer in favour of stateless hashing
+
+Revision ID: 010
+Revises: 009
+Create Date: 2025-11-07 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.drop_column('documents', 'tfidf_vectorizer')
+    # Matrices built with the fitted vocabulary don't match hashed queries;
+    # retrieval re-encodes documents without one
+    op.execute("UPDATE documents SET tfidf_matrix = NULL")
+
+
+def downgrade():
+    op.add_column('documents', sa.Column('tfidf_vectorizer', sa.LargeBinary(), nullable=True))
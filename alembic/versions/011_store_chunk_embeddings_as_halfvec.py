@@ -0,0 +1,46 @@
+"""store chunk embeddings as half-precision halfvec
+
+Revision ID: 011
+Revises: 010
+Create Date: 2025-11-07 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+# Dimension of the Gemini embedding-001 vectors
+EMBEDDING_DIM = 768
+
+
+def upgrade():
+    # The HNSW index is tied to the column type and operator class
+    op.execute("DROP INDEX IF EXISTS ix_document_chunks_embedding_hnsw")
+    
+    # Unit-length vectors lose nothing meaningful for ranking at 16 bits
+    op.execute(
+        f"ALTER TABLE document_chunks ALTER COLUMN embedding TYPE halfvec({EMBEDDING_DIM}) "
+        f"USING (embedding::halfvec({EMBEDDING_DIM}))"
+    )
+    
+    op.execute(
+        "CREATE INDEX ix_document_chunks_embedding_hnsw ON document_chunks "
+        "USING hnsw (embedding halfvec_ip_ops)"
+    )
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_document_chunks_embedding_hnsw")
+    op.execute(
+        f"ALTER TABLE document_chunks ALTER COLUMN embedding TYPE vector({EMBEDDING_DIM}) "
+        f"USING (embedding::vector({EMBEDDING_DIM}))"
+    )
+    op.execute(
+        "CREATE INDEX ix_document_chunks_embedding_hnsw ON document_chunks "
+        "USING hnsw (embedding vector_ip_ops)"
+    )
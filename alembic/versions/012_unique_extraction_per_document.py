@@ -0,0 +1,55 @@
+"""make extraction_results.document_id unique and drop redundant id indexes
+
+Revision ID: 012
+Revises: 011
+Create Date: 2025-11-07 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Extraction results are looked up by document and only the first one is
+    # ever used, so keep the newest row per document before enforcing it.
+    # Rows without created_at rank last and id breaks ties, so exactly one
+    # row survives per document.
+    op.execute(
+        "DELETE FROM extraction_results WHERE id IN ("
+        "SELECT id FROM ("
+        "SELECT id, ROW_NUMBER() OVER ("
+        "PARTITION BY document_id ORDER BY created_at DESC NULLS LAST, id DESC"
+        ") AS position FROM extraction_results"
+        ") ranked WHERE position > 1)"
+    )
+    
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_extraction_results_document_id_unique',
+            'extraction_results',
+            ['document_id'],
+            unique=True,
+            postgresql_concurrently=True
+        )
+    op.drop_index('ix_extraction_results_document_id', 'extraction_results')
+    op.execute(
+        "ALTER INDEX ix_extraction_results_document_id_unique "
+        "RENAME TO ix_extraction_results_document_id"
+    )
+    
+    # The primary keys already provide unique indexes on id
+    op.drop_index('ix_extraction_results_id', 'extraction_results')
+    op.drop_index('ix_documents_id', 'documents')
+
+
+def downgrade():
+    op.create_index('ix_documents_id', 'documents', ['id'])
+    op.create_index('ix_extraction_results_id', 'extraction_results', ['id'])
+    op.drop_index('ix_extraction_results_document_id', 'extraction_results')
+    op.create_index('ix_extraction_results_document_id', 'extraction_results', ['document_id'])
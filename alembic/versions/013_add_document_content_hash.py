@@ -0,0 +1,33 @@
+"""add SHA-256 content hash to documents
+
+Revision ID: 013
+Revises: 012
+Create Date: 2025-11-08 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '013'
+down_revision = '012'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing rows stay NULL; only new uploads are hashed
+    op.add_column('documents', sa.Column('content_hash', sa.String(64), nullable=True))
+    
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_documents_content_hash',
+            'documents',
+            ['content_hash'],
+            postgresql_concurrently=True
+        )
+
+
+def downgrade():
+    op.drop_index('ix_documents_content_hash', 'documents')
+    op.drop_column('documents', 'content_hash')
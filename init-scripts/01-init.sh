@@ -37,6 +37,9 @@ psql -v ON_ERROR_STOP=1 --username "$POSTGRES_USER" --dbname "$POSTGRES_DB" <<-E
     -- Enable pg_trgm for better text search (optional)
     CREATE EXTENSION IF NOT EXISTS pg_trgm;
     
+    -- Enable pgvector for chunk embeddings and similarity search
+    CREATE EXTENSION IF NOT EXISTS vector;
+    
     -- Create indexes for better performance (will be created by Alembic too)
     -- This is just a placeholder for additional setup
     
@@ -11,9 +11,14 @@ It handles all edge cases including:
 - Error handling and rollback
 """
 
+import gc
+import io
 import os
 import sys
-from sqlalchemy import create_engine, text
+from concurrent.futures import ProcessPoolExecutor
+import orjson
+from sqlalchemy import JSON, create_engine, event, func, inspect, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import SQLAlchemyError
 import logging
@@ -42,6 +47,23 @@ POSTGRES_URL = os.getenv(
 # Batch size for processing large datasets
 BATCH_SIZE = 100
 
+# Run a full garbage collection after this many batches
+GC_EVERY_BATCHES = 10
+
+# Pragmas applied to every SQLite connection to speed up the sequential read
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-131072",  # 128MB page cache
+    "PRAGMA temp_store=MEMORY",
+)
+
+# maintenance_work_mem used while rebuilding indexes after the bulk load
+INDEX_BUILD_MEMORY = os.getenv("INDEX_BUILD_MEMORY", "512MB")
+
+# Number of worker processes used to migrate each table in parallel
+MIGRATION_WORKERS = int(os.getenv("MIGRATION_WORKERS", str(os.cpu_count() or 1)))
+
 
 def check_sqlite_exists():
     """Check if SQLite database file exists"""
@@ -52,16 +74,36 @@ def check_sqlite_exists():
     return True
 
 
+def _json_dumps(value):
+    """Serialize JSON values with orjson (SQLAlchemy and COPY expect str)"""
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
 def create_engines():
     """Create database engines"""
     try:
         sqlite_engine = create_engine(
             SQLITE_URL,
-            connect_args={"check_same_thread": False}
+            connect_args={"check_same_thread": False},
+            json_deserializer=orjson.loads
         )
+        
+        @event.listens_for(sqlite_engine, "connect")
+        def set_sqlite_pragmas(dbapi_conn, connection_record):
+            """Tune each new SQLite connection for fast reads"""
+            cursor = dbapi_conn.cursor()
+            for pragma in SQLITE_PRAGMAS:
+                cursor.execute(pragma)
+            cursor.close()
+        
         postgres_engine = create_engine(
             POSTGRES_URL,
-            pool_pre_ping=True
+            pool_pre_ping=True,
+            json_serializer=_json_dumps,
+            json_deserializer=orjson.loads,
+            executemany_mode="values_plus_batch",
+            executemany_values_page_size=1000,
+            executemany_batch_page_size=500
         )
         return sqlite_engine, postgres_engine
     except Exception as e:
@@ -95,8 +137,13 @@ def get_table_counts(engine):
     session = Session()
     
     try:
-        counts['documents'] = session.query(Document).count()
-        counts['extraction_results'] = session.query(ExtractionResult).count()
+        counts['documents'] = session.execute(
+            select(func.count()).select_from(Document.__table__)
+        ).scalar()
+        # Only the newest extraction per document is migrated
+        counts['extraction_results'] = session.execute(
+            select(func.count(ExtractionResult.document_id.distinct()))
+        ).scalar()
     except Exception as e:
         logger.warning(f"Could not get table counts: {e}")
         counts = {'documents': 0, 'extraction_results': 0}
@@ -106,121 +153,309 @@ def get_table_counts(engine):
     return counts
 
 
-def migrate_documents(sqlite_session, postgres_session):
-    """Migrate documents table"""
-    logger.info("Migrating documents...")
+def _insert_batch(postgres_session, model, mappings):
+    """Insert a batch in one statement, skipping rows that already exist"""
+    stmt = pg_insert(model).values(mappings).on_conflict_do_nothing()
+    inserted = postgres_session.execute(stmt).rowcount
+    postgres_session.commit()
+    return inserted
+
+
+def _drop_existing(postgres_session, model, mappings):
+    """Remove rows that already exist in PostgreSQL, using one lookup per batch"""
+    ids = [row["id"] for row in mappings]
+    existing = {
+        row[0] for row in postgres_session.execute(select(model.id).where(model.id.in_(ids)))
+    }
+    return [row for row in mappings if row["id"] not in existing]
+
+
+def _copy_field(value, is_json):
+    """Render a value as a CSV field for COPY; unquoted empty fields are NULL"""
+    if value is None:
+        return ""
+    if is_json:
+        value = _json_dumps(value)
+    elif isinstance(value, bool):
+        value = "t" if value else "f"
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        value = "\\x" + bytes(value).hex()  # bytea hex format
+    elif hasattr(value, "isoformat"):
+        value = value.isoformat()
+    else:
+        value = str(value)
+    return '"' + value.replace('"', '""') + '"'
+
+
+def copy_rows(postgres_session, model, mappings, skip_existing=False):
+    """
+    Load a batch with COPY FROM STDIN.
+    COPY cannot skip existing rows, so the batch is copied into a temporary
+    staging table and moved over with INSERT ... ON CONFLICT DO NOTHING,
+    which leaves duplicate detection to the server's unique indexes.
+    With skip_existing, rows already present are filtered out first so a
+    resumed run does not send them again.
+    Falls back to a multi-row INSERT when the driver has no COPY support.
+    """
+    if skip_existing:
+        mappings = _drop_existing(postgres_session, model, mappings)
+        if not mappings:
+            postgres_session.commit()
+            return 0
+    
+    cursor = postgres_session.connection().connection.cursor()
+    if not hasattr(cursor, "copy_expert"):
+        cursor.close()
+        return _insert_batch(postgres_session, model, mappings)
+    
+    table = model.__table__
+    columns = list(mappings[0].keys())
+    json_columns = {c.name for c in table.columns if isinstance(c.type, JSON)}
+    column_list = ", ".join(columns)
+    staging = f"staging_{table.name}"
+    
+    buffer = io.StringIO()
+    for row in mappings:
+        buffer.write(",".join(_copy_field(row[c], c in json_columns) for c in columns))
+        buffer.write("\n")
+    buffer.seek(0)
     
     try:
-        # Get total count
-        total = sqlite_session.query(Document).count()
-        if total == 0:
-            logger.info("No documents to migrate")
-            return 0
-        
-        logger.info(f"Found {total} documents to migrate")
-        
-        migrated = 0
-        offset = 0
-        
-        while offset < total:
-            # Fetch batch from SQLite
-            documents = sqlite_session.query(Document).limit(BATCH_SIZE).offset(offset).all()
-            
-            for doc in documents:
-                # Create new document instance for PostgreSQL
-                new_doc = Document(
-                    id=doc.id,
-                    filename=doc.filename,
-                    file_size=doc.file_size,
-                    uploaded_at=doc.uploaded_at,
-                    status=doc.status,
-                    extracted_text=doc.extracted_text,
-                    document_metadata=doc.document_metadata
-                )
-                
-                # Check if already exists
-                existing = postgres_session.query(Document).filter_by(id=doc.id).first()
-                if existing:
-                    logger.debug(f"Document {doc.id} already exists, skipping")
-                    continue
-                
-                postgres_session.add(new_doc)
-                migrated += 1
+        cursor.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS {staging} "
+            f"(LIKE {table.name} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+        )
+        cursor.copy_expert(f"COPY {staging} ({column_list}) FROM STDIN WITH (FORMAT csv)", buffer)
+        cursor.execute(
+            f"INSERT INTO {table.name} ({column_list}) "
+            f"SELECT {column_list} FROM {staging} ON CONFLICT DO NOTHING"
+        )
+        inserted = cursor.rowcount
+    finally:
+        cursor.close()
+    
+    postgres_session.commit()
+    return inserted
+
+
+def _source_columns(sqlite_session, table):
+    """
+    Columns of the model table that also exist in the SQLite source.
+    Older databases predate columns added by later migrations; those are
+    left to their defaults in PostgreSQL.
+    """
+    present = {
+        column["name"]
+        for column in inspect(sqlite_session.connection()).get_columns(table.name)
+    }
+    return [column for column in table.columns if column.name in present]
+
+
+def _newest_extraction_ids():
+    """
+    Ids of the newest extraction result per document.
+    Older databases allowed several per document, but PostgreSQL enforces
+    one, so the older ones are left behind (as alembic revision 012 does).
+    """
+    table = ExtractionResult.__table__
+    position = func.row_number().over(
+        partition_by=table.c.document_id,
+        order_by=(table.c.created_at.desc().nulls_last(), table.c.id.desc())
+    ).label("position")
+    ranked = select(table.c.id, position).subquery()
+    return select(ranked.c.id).where(ranked.c.position == 1)
+
+
+def _stream_table(sqlite_session, postgres_session, model, label, id_range=None):
+    """
+    Stream rows of a table from SQLite and bulk insert them into PostgreSQL.
+    Rows are read as plain Core rows through a single streaming cursor, so
+    no ORM objects are built and memory stays bounded by BATCH_SIZE
+    regardless of table size. When id_range is given only rows with
+    lower <= id <= upper are copied.
+    """
+    table = model.__table__
+    stmt = select(*_source_columns(sqlite_session, table))
+    if id_range is not None:
+        stmt = stmt.where(table.c.id.between(*id_range))
+    if model is ExtractionResult:
+        stmt = stmt.where(table.c.id.in_(_newest_extraction_ids()))
+    rows = sqlite_session.execute(
+        stmt.execution_options(stream_results=True, yield_per=BATCH_SIZE)
+    )
+    
+    # Only a resumed run needs the client-side existence check; on a fresh
+    # target ON CONFLICT handles everything server-side
+    target = select(table.c.id).limit(1)
+    if id_range is not None:
+        target = target.where(table.c.id.between(*id_range))
+    resuming = postgres_session.execute(target).first() is not None
+    postgres_session.commit()
+    
+    seen = 0
+    migrated = 0
+    batches = 0
+    batch = []
+    
+    for row in rows:
+        batch.append(dict(row._mapping))
+        if len(batch) == BATCH_SIZE:
+            migrated += copy_rows(postgres_session, model, batch, skip_existing=resuming)
+            seen += len(batch)
+            batches += 1
+            batch = []
+            logger.info(f"Processed {seen} {label}")
             
-            # Commit batch
-            postgres_session.commit()
-            offset += BATCH_SIZE
-            logger.info(f"Migrated {min(offset, total)}/{total} documents")
+            # Keep the target session empty between batches so memory stays flat
+            postgres_session.expunge_all()
+            if batches % GC_EVERY_BATCHES == 0:
+                gc.collect()
+    
+    if batch:
+        migrated += copy_rows(postgres_session, model, batch, skip_existing=resuming)
+        seen += len(batch)
+        logger.info(f"Processed {seen} {label}")
+    
+    if seen == 0:
+        logger.info(f"No {label} to migrate")
+    
+    return migrated
+
+
+# Tables that can be migrated, keyed by table name
+MIGRATED_TABLES = {
+    "documents": (Document, "documents"),
+    "extraction_results": (ExtractionResult, "extraction results"),
+}
+
+
+def _secondary_indexes():
+    """
+    Non-unique indexes declared on the migrated tables.
+    Unique indexes stay in place during the load, so ON CONFLICT can
+    skip rows that would violate them.
+    """
+    for model, _ in MIGRATED_TABLES.values():
+        yield from sorted(
+            (index for index in model.__table__.indexes if not index.unique),
+            key=lambda index: index.name
+        )
+
+
+def drop_secondary_indexes(postgres_engine):
+    """Drop secondary indexes so the bulk load does not maintain them row by row"""
+    with postgres_engine.begin() as conn:
+        for index in _secondary_indexes():
+            conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+            logger.info(f"Dropped index {index.name}")
+
+
+def rebuild_secondary_indexes(postgres_engine):
+    """Rebuild secondary indexes in one sorted pass each, without blocking writes"""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with postgres_engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"SET maintenance_work_mem = '{INDEX_BUILD_MEMORY}'"))
+        
+        # A failed concurrent build leaves an INVALID index that IF NOT EXISTS
+        # would otherwise skip on every later run
+        invalid = conn.execute(
+            text(
+                "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE NOT i.indisvalid AND c.relname = ANY(:names)"
+            ),
+            {"names": [index.name for index in _secondary_indexes()]}
+        ).scalars().all()
+        for name in invalid:
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+            logger.warning(f"Dropped invalid index {name}")
         
+        for index in _secondary_indexes():
+            columns = ", ".join(column.name for column in index.columns)
+            try:
+                conn.execute(text(
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index.name} "
+                    f"ON {index.table.name} ({columns})"
+                ))
+            except SQLAlchemyError as e:
+                logger.error(f"Failed to rebuild index {index.name}: {e}")
+                continue
+            logger.info(f"Rebuilt index {index.name}")
+
+
+def _get_id_ranges(sqlite_engine, table, shards):
+    """Split the ids of a table into contiguous (lower, upper) ranges of similar size"""
+    with sqlite_engine.connect() as conn:
+        ids = [row[0] for row in conn.execute(text(f"SELECT id FROM {table} ORDER BY id"))]
+    
+    if not ids:
+        return []
+    
+    size = -(-len(ids) // max(shards, 1))
+    return [(ids[i], ids[min(i + size, len(ids)) - 1]) for i in range(0, len(ids), size)]
+
+
+def _migrate_shard(table, id_range):
+    """
+    Migrate one id range of a table.
+    Runs inside a worker process, so it builds its own engines rather than
+    sharing the parent's connections across the fork.
+    """
+    model, label = MIGRATED_TABLES[table]
+    sqlite_engine, postgres_engine = create_engines()
+    sqlite_session = sessionmaker(bind=sqlite_engine)()
+    postgres_session = sessionmaker(bind=postgres_engine)()
+    
+    try:
+        return _stream_table(sqlite_session, postgres_session, model, label, id_range)
+    except Exception:
+        postgres_session.rollback()
+        raise
+    finally:
+        sqlite_session.close()
+        postgres_session.close()
+        sqlite_engine.dispose()
+        postgres_engine.dispose()
+
+
+def _migrate_table(sqlite_engine, table, pool):
+    """Migrate a table by spreading its id ranges over the worker pool"""
+    id_ranges = _get_id_ranges(sqlite_engine, table, MIGRATION_WORKERS)
+    if not id_ranges:
+        logger.info(f"No {MIGRATED_TABLES[table][1]} to migrate")
+        return 0
+    
+    if pool is None or len(id_ranges) == 1:
+        return sum(_migrate_shard(table, id_range) for id_range in id_ranges)
+    
+    futures = [pool.submit(_migrate_shard, table, id_range) for id_range in id_ranges]
+    return sum(future.result() for future in futures)
+
+
+def migrate_documents(sqlite_engine, pool=None):
+    """Migrate documents table"""
+    logger.info("Migrating documents...")
+    
+    try:
+        migrated = _migrate_table(sqlite_engine, "documents", pool)
         logger.info(f"✓ Successfully migrated {migrated} documents")
         return migrated
         
     except Exception as e:
         logger.error(f"Error migrating documents: {e}")
-        postgres_session.rollback()
         raise
 
 
-def migrate_extraction_results(sqlite_session, postgres_session):
+def migrate_extraction_results(sqlite_engine, pool=None):
     """Migrate extraction_results table"""
     logger.info("Migrating extraction results...")
     
     try:
-        # Get total count
-        total = sqlite_session.query(ExtractionResult).count()
-        if total == 0:
-            logger.info("No extraction results to migrate")
-            return 0
-        
-        logger.info(f"Found {total} extraction results to migrate")
-        
-        migrated = 0
-        offset = 0
-        
-        while offset < total:
-            # Fetch batch from SQLite
-            results = sqlite_session.query(ExtractionResult).limit(BATCH_SIZE).offset(offset).all()
-            
-            for result in results:
-                # Create new extraction result instance for PostgreSQL
-                new_result = ExtractionResult(
-                    id=result.id,
-                    document_id=result.document_id,
-                    parties=result.parties,
-                    effective_date=result.effective_date,
-                    term=result.term,
-                    governing_law=result.governing_law,
-                    payment_terms=result.payment_terms,
-                    termination=result.termination,
-                    auto_renewal=result.auto_renewal,
-                    confidentiality=result.confidentiality,
-                    indemnity=result.indemnity,
-                    liability_cap=result.liability_cap,
-                    signatories=result.signatories,
-                    confidence_score=result.confidence_score,
-                    created_at=result.created_at
-                )
-                
-                # Check if already exists
-                existing = postgres_session.query(ExtractionResult).filter_by(id=result.id).first()
-                if existing:
-                    logger.debug(f"Extraction result {result.id} already exists, skipping")
-                    continue
-                
-                postgres_session.add(new_result)
-                migrated += 1
-            
-            # Commit batch
-            postgres_session.commit()
-            offset += BATCH_SIZE
-            logger.info(f"Migrated {min(offset, total)}/{total} extraction results")
-        
+        migrated = _migrate_table(sqlite_engine, "extraction_results", pool)
         logger.info(f"✓ Successfully migrated {migrated} extraction results")
         return migrated
         
     except Exception as e:
         logger.error(f"Error migrating extraction results: {e}")
-        postgres_session.rollback()
         raise
 
 
@@ -312,11 +547,20 @@ def main():
         start_time = datetime.now()
         
         try:
-            # Migrate documents first (parent table)
-            docs_migrated = migrate_documents(sqlite_session, postgres_session)
-            
-            # Migrate extraction results (child table)
-            results_migrated = migrate_extraction_results(sqlite_session, postgres_session)
+            logger.info(f"Using {MIGRATION_WORKERS} worker process(es)")
+            drop_secondary_indexes(postgres_engine)
+            pool = ProcessPoolExecutor(max_workers=MIGRATION_WORKERS) if MIGRATION_WORKERS > 1 else None
+            try:
+                # Migrate documents first (parent table); all shards finish
+                # before any child rows are written
+                docs_migrated = migrate_documents(sqlite_engine, pool)
+                
+                # Migrate extraction results (child table)
+                results_migrated = migrate_extraction_results(sqlite_engine, pool)
+            finally:
+                if pool is not None:
+                    pool.shutdown()
+                rebuild_secondary_indexes(postgres_engine)
             
             # Verify migration
             verification_passed = verify_migration(sqlite_session, postgres_session)
@@ -1,5 +1,5 @@
 # src/config.py
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import declarative_base
 from pydantic_settings import BaseSettings
 from typing import Optional
 import os
@@ -20,10 +20,17 @@ class Settings(BaseSettings):
     POSTGRES_PORT: int = int(os.getenv("POSTGRES_PORT", "5432"))
     
     # Database Pool Settings
-    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
-    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "20"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "40"))
     DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))
-    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "3600"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    
+    # Log every SQL statement (independent of ENVIRONMENT)
+    DB_ECHO: bool = os.getenv("DB_ECHO", "false").lower() == "true"
+    
+    # Redis cache for Gemini results (disabled when unset)
+    REDIS_URL: Optional[str] = os.getenv("REDIS_URL")
+    CACHE_TTL_SECONDS: int = int(os.getenv("CACHE_TTL_SECONDS", "86400"))
     
     # Application Settings
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
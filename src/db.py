@@ -1,22 +1,30 @@
 # src/db.py
 from sqlalchemy import create_engine, event, pool, text
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.exc import OperationalError
 from src.config import settings
 import logging
+import orjson
 import time
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging unless the host application already did
+if not logging.getLogger().handlers:
+    logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Determine if we're using PostgreSQL or SQLite
 is_postgres = settings.DATABASE_URL.startswith("postgresql")
 is_sqlite = settings.DATABASE_URL.startswith("sqlite")
 
+def json_serializer(value):
+    """Serialize JSON column values with orjson (SQLAlchemy expects str)"""
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY).decode()
+
+
 # Configure engine parameters based on database type
 engine_kwargs = {
-    "echo": settings.ENVIRONMENT == "development",
+    "echo": settings.DB_ECHO,
+    "json_serializer": json_serializer,
+    "json_deserializer": orjson.loads,
 }
 
 if is_postgres:
@@ -28,6 +36,10 @@ if is_postgres:
         "pool_recycle": settings.DB_POOL_RECYCLE,
         "pool_pre_ping": True,  # Enable connection health checks
         "poolclass": pool.QueuePool,
+        # Use psycopg2's execute_values/execute_batch helpers for executemany
+        "executemany_mode": "values_plus_batch",
+        "executemany_values_page_size": 1000,
+        "executemany_batch_page_size": 500,
     })
     logger.info("Configuring PostgreSQL engine with connection pooling")
 elif is_sqlite:
@@ -60,35 +72,14 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 def get_db():
     """
     Dependency for FastAPI to get database session.
-    Includes retry logic for handling temporary connection issues.
+    Connection health is verified by the pool on checkout (pool_pre_ping),
+    so no extra round-trip is made per request.
     """
-    max_retries = 3
-    retry_delay = 1  # seconds
-    
-    for attempt in range(max_retries):
-        db = SessionLocal()
-        try:
-            # Test the connection
-            db.execute(text("SELECT 1"))
-            yield db
-            return
-        except OperationalError as e:
-            db.close()
-            if attempt < max_retries - 1:
-                logger.warning(
-                    f"Database connection failed (attempt {attempt + 1}/{max_retries}): {e}"
-                )
-                time.sleep(retry_delay)
-            else:
-                logger.error(f"Database connection failed after {max_retries} attempts: {e}")
-                raise
-        except Exception as e:
-            db.close()
-            logger.error(f"Unexpected database error: {e}")
-            raise
-        finally:
-            if db:
-                db.close()
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
 
 def check_db_connection():
     """
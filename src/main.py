@@ -1,10 +1,15 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from src.routers import ingest, extract  # import both routers
+from src.routers import ingest, extract, documents
 from dotenv import load_dotenv
 from src.routers.ask_route import router as ask_router
 from src.routers.audit import router as audit_router
 from src.db import check_db_connection
+import anyio
+import google.generativeai as genai
+from google.generativeai.client import get_default_generative_client
 import logging
+import os
 
 # ---- Configure logging ----
 logging.basicConfig(level=logging.INFO)
@@ -13,33 +18,47 @@ logger = logging.getLogger(__name__)
 # ---- Load environment variables (.env) ----
 load_dotenv()
 
-# ---- Initialize FastAPI app ----
-app = FastAPI(
-    title="Contract Intelligence API",
-    description="AI-powered contract analysis and clause extraction API",
-    version="2.0.0",
-)
-
-
-# ---- Startup Event ----
-@app.on_event("startup")
-async def startup_event():
+# ---- Lifespan ----
+@asynccontextmanager
+async def lifespan(app: FastAPI):
     """Initialize services on startup"""
     logger.info("Starting Contract Intelligence API...")
     
-    # Check database connection (non-blocking)
+    # Configure Gemini once for every router and open its client now, so the
+    # first request does not pay for the connection setup
+    gemini_api_key = os.getenv("GEMINI_API_KEY")
+    if gemini_api_key:
+        genai.configure(api_key=gemini_api_key)
+        await anyio.to_thread.run_sync(get_default_generative_client)
+        logger.info("✓ Gemini API configured")
+    else:
+        logger.warning("⚠ GEMINI_API_KEY not found - AI endpoints will not work")
+    
+    # Check database connection in a worker thread so the event loop stays free
     try:
-        if check_db_connection():
+        if await anyio.to_thread.run_sync(check_db_connection):
             logger.info("✓ Database connection established")
         else:
             logger.warning("⚠ Database connection check returned False - will retry on first request")
     except Exception as e:
         logger.warning(f"⚠ Database connection check failed with error: {e} - will retry on first request")
+    
+    yield
+
+
+# ---- Initialize FastAPI app ----
+app = FastAPI(
+    title="Contract Intelligence API",
+    description="AI-powered contract analysis and clause extraction API",
+    version="2.0.0",
+    lifespan=lifespan,
+)
 
 
 # ---- Include Routers ----
 app.include_router(ingest.router, prefix="/api", tags=["Ingest"])
 app.include_router(extract.router, prefix="/api", tags=["Extract"])
+app.include_router(documents.router, prefix="/api", tags=["Documents"])
 app.include_router(ask_router, prefix="/api", tags=["Ask"])
 app.include_router(audit_router, prefix="/api", tags=["Audit"])
 
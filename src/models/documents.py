@@ -1,22 +1,39 @@
 import uuid
-from sqlalchemy import Column, String, Integer, DateTime, Text, JSON, Float, ForeignKey, Boolean, ARRAY
+from sqlalchemy import Column, String, Integer, DateTime, Text, JSON, Float, ForeignKey, Boolean, ARRAY, Index, LargeBinary
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from pgvector.sqlalchemy import HALFVEC
 from src.config import Base
 
+# Dimension of the Gemini embedding-001 vectors
+EMBEDDING_DIM = 768
+
+# Native 16-byte UUID on PostgreSQL, plain string elsewhere (SQLite).
+# Values are handled as strings in Python either way.
+UUIDString = String().with_variant(UUID(as_uuid=False), "postgresql")
+
+# Binary JSONB on PostgreSQL, plain JSON elsewhere (SQLite)
+JSONDocument = JSON().with_variant(JSONB(), "postgresql")
+
 def generate_uuid():
     return str(uuid.uuid4())
 
 class Document(Base):
     __tablename__ = "documents"
+    # Don't fetch server defaults back with RETURNING on every INSERT
+    __mapper_args__ = {"eager_defaults": False}
 
-    id = Column(String, primary_key=True, default=generate_uuid, index=True)
+    id = Column(UUIDString, primary_key=True, default=generate_uuid)
     filename = Column(String, index=True, nullable=False)
     file_size = Column(Integer, nullable=True)
+    content_hash = Column(String(64), nullable=True, index=True)  # SHA-256 of the uploaded file
     uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
     status = Column(String, default="uploaded", index=True)
     extracted_text = Column(Text, nullable=True)
-    document_metadata = Column(JSON, nullable=True)
+    document_metadata = Column(JSONDocument, nullable=True)
+    # Hashed term vectors of the chunks, only loaded when fallback retrieval needs them
+    tfidf_matrix = deferred(Column(LargeBinary, nullable=True))  # scipy.sparse .npz of chunk vectors
     
     # Relationships
     chunks = relationship("DocumentChunk", back_populates="document", cascade="all, delete-orphan")
@@ -26,15 +43,20 @@ class Document(Base):
 class DocumentChunk(Base):
     """Store text chunks with embeddings for RAG"""
     __tablename__ = "document_chunks"
+    __table_args__ = (
+        # Chunks are read by document in chunk order
+        Index("ix_document_chunks_document_id_chunk_index", "document_id", "chunk_index"),
+    )
+    __mapper_args__ = {"eager_defaults": False}
 
-    id = Column(String, primary_key=True, default=generate_uuid, index=True)
-    document_id = Column(String, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, index=True)
+    id = Column(UUIDString, primary_key=True, default=generate_uuid)
+    document_id = Column(UUIDString, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
     chunk_text = Column(Text, nullable=False)
     chunk_index = Column(Integer, nullable=False)  # Position in document
     page_number = Column(Integer, nullable=True)  # PDF page number
     char_start = Column(Integer, nullable=True)  # Character range start
     char_end = Column(Integer, nullable=True)  # Character range end
-    embedding = Column(JSON, nullable=True)  # Store embedding as JSON array
+    embedding = Column(HALFVEC(EMBEDDING_DIM), nullable=True)  # Unit-length embedding, half precision
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationship
@@ -43,10 +65,15 @@ class DocumentChunk(Base):
 
 class ExtractionResult(Base):
     __tablename__ = "extraction_results"
+    __table_args__ = (
+        # One stored extraction per document, looked up by document_id
+        Index("ix_extraction_results_document_id", "document_id", unique=True),
+    )
+    __mapper_args__ = {"eager_defaults": False}
 
-    id = Column(String, primary_key=True, default=generate_uuid, index=True)
-    document_id = Column(String, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, index=True)
-    parties = Column(JSON, nullable=True)
+    id = Column(UUIDString, primary_key=True, default=generate_uuid)
+    document_id = Column(UUIDString, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
+    parties = Column(JSONDocument, nullable=True)
     effective_date = Column(String, nullable=True)
     term = Column(String, nullable=True)
     governing_law = Column(String, nullable=True)
@@ -55,10 +82,21 @@ class ExtractionResult(Base):
     auto_renewal = Column(Boolean, nullable=True)
     confidentiality = Column(Text, nullable=True)
     indemnity = Column(Text, nullable=True)
-    liability_cap = Column(JSON, nullable=True)  # {"amount": 1000000, "currency": "USD"}
-    signatories = Column(JSON, nullable=True)  # [{"name": "John Doe", "title": "CEO"}]
+    liability_cap = Column(JSONDocument, nullable=True)  # {"amount": 1000000, "currency": "USD"}
+    signatories = Column(JSONDocument, nullable=True)  # [{"name": "John Doe", "title": "CEO"}]
     confidence_score = Column(Float, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationship
     document = relationship("Document", back_populates="extraction_results")
+
+
+class EmbeddingCache(Base):
+    """Embeddings keyed by SHA-256 of model name and text"""
+    __tablename__ = "embedding_cache"
+    __mapper_args__ = {"eager_defaults": False}
+
+    hash = Column(String(64), primary_key=True)
+    model = Column(String, nullable=False)
+    embedding = Column(LargeBinary, nullable=False)  # Packed float32 vector
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
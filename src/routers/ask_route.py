@@ -1,38 +1,57 @@
 from fastapi import APIRouter, HTTPException, Depends, status
-from sqlalchemy.orm import Session
+from sqlalchemy import Row, func, select
+from sqlalchemy.orm import Session, aliased
 from sqlalchemy.exc import SQLAlchemyError
-from src.db import get_db
-from src.models.documents import Document, DocumentChunk
+from src.db import get_db, is_postgres
+from src.models.documents import Document, DocumentChunk, EMBEDDING_DIM
+from src.services import embedding_cache, tfidf_index
 from pydantic import BaseModel, Field
 import google.generativeai as genai
 import numpy as np
 import os
 from dotenv import load_dotenv
 import logging
-from typing import List, Dict, Any, Optional
+import asyncio
+from typing import Annotated, List, Dict, Any, Optional, Tuple
 import uuid
 import time
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity as sklearn_cosine_similarity
+import threading
+from cachetools import TTLCache
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# SimSIMD provides SIMD dot-product kernels; NumPy is used when it is missing
+try:
+    import simsimd
+except ImportError:
+    simsimd = None
+
 load_dotenv()
 
-# Configure Gemini
+# Gemini itself is configured once at app startup (src/main.py)
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if not GEMINI_API_KEY:
     logger.warning("GEMINI_API_KEY not found - ask endpoint will not work")
 
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-    logger.info("Gemini API configured for ask endpoint")
-
 # Models
 EMBED_MODEL = "models/embedding-001"
 LLM_MODEL = "gemini-2.0-flash-exp"
 
+# Built once and shared by all requests
+model = genai.GenerativeModel(LLM_MODEL) if GEMINI_API_KEY else None
+
+# Gemini accepts up to 100 texts per embedding request
+EMBED_BATCH_SIZE = 100
+EMBED_CONCURRENCY = 4
+
+# Chunk rows and their stacked embedding matrix per document, so repeated
+# questions about the same contract skip the chunk query and matrix assembly
+CHUNK_CACHE_SIZE = 32
+CHUNK_CACHE_TTL = 600  # seconds
+_chunk_cache = TTLCache(maxsize=CHUNK_CACHE_SIZE, ttl=CHUNK_CACHE_TTL)
+_chunk_cache_lock = threading.Lock()
+
 router = APIRouter()
 
 # Pydantic schemas
@@ -51,6 +70,23 @@ class AskRequest(BaseModel):
         }
 
 
+class AskBatchRequest(BaseModel):
+    document_id: str = Field(..., description="UUID of the document to query")
+    queries: List[Annotated[str, Field(min_length=1, max_length=1000)]] = Field(
+        ..., min_length=1, max_length=10, description="Questions about the contract"
+    )
+    top_k: int = Field(default=5, ge=1, le=20, description="Number of relevant chunks to retrieve per question")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "document_id": "123e4567-e89b-12d3-a456-426614174000",
+                "queries": ["What are the termination terms?", "Who are the parties?"],
+                "top_k": 5
+            }
+        }
+
+
 class Citation(BaseModel):
     document_id: str
     chunk_id: str
@@ -67,64 +103,157 @@ class AskResponse(BaseModel):
     document_id: str
 
 
-def cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
-    """Compute cosine similarity between two vectors"""
-    try:
-        a = np.array(vec1)
-        b = np.array(vec2)
-        
-        if len(a) == 0 or len(b) == 0:
-            return 0.0
-        
-        norm_a = np.linalg.norm(a)
-        norm_b = np.linalg.norm(b)
-        
-        if norm_a == 0 or norm_b == 0:
-            return 0.0
-        
-        return float(np.dot(a, b) / (norm_a * norm_b))
-    except Exception as e:
-        logger.error(f"Error computing cosine similarity: {e}")
-        return 0.0
+class AskBatchResponse(BaseModel):
+    document_id: str
+    results: List[AskResponse]
+
+
+def top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """
+    Indices of the top-k scores, highest first
+    
+    argpartition selects the k best in O(N); only those k are then sorted,
+    stably, so tied scores keep their index order.
+    """
+    k = min(top_k, scores.size)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    
+    top_indices = np.sort(np.argpartition(-scores, k - 1)[:k])
+    return top_indices[np.argsort(-scores[top_indices], kind="stable")]
+
+
+def build_embedding_matrix(chunks: List[DocumentChunk]) -> Tuple[List[DocumentChunk], Optional[np.ndarray]]:
+    """
+    Stack the embeddings of the chunks that have one into an (N, D) float32 matrix
+    
+    Returns: (embedded chunks, matrix with one row per embedded chunk or None)
+    """
+    embedded = [
+        (chunk, chunk.embedding.to_numpy())
+        for chunk in chunks
+        if chunk.embedding is not None
+    ]
+    
+    # Drop malformed embeddings up front so stacking and scoring can't fail per chunk
+    valid = [(chunk, vector) for chunk, vector in embedded if vector.shape == (EMBEDDING_DIM,)]
+    if len(valid) < len(embedded):
+        logger.warning(f"Skipping {len(embedded) - len(valid)} chunk(s) with malformed embeddings")
+    
+    if not valid:
+        return [], None
+    
+    embedded_chunks = [chunk for chunk, _ in valid]
+    # Embeddings are stored as half precision; widen once for the products
+    matrix = np.stack([vector for _, vector in valid]).astype(np.float32)
+    
+    return embedded_chunks, matrix
 
 
 def retrieve_relevant_chunks(
     query_embedding: List[float],
     chunks: List[DocumentChunk],
-    top_k: int
+    top_k: int,
+    matrix: Optional[np.ndarray] = None
 ) -> List[tuple]:
     """
     Retrieve top-k most relevant chunks based on cosine similarity
     
+    Chunk embeddings are stored L2-normalized, so after normalizing the
+    query once all chunks are scored with a single matrix-vector dot product.
+    A matrix from build_embedding_matrix can be passed in, in which case
+    chunks must be the embedded chunks it was built from.
+    
     Returns: List of (chunk, similarity_score) tuples
     """
-    scored_chunks = []
+    if matrix is None:
+        chunks, matrix = build_embedding_matrix(chunks)
     
-    for chunk in chunks:
-        if chunk.embedding:
-            try:
-                similarity = cosine_similarity(query_embedding, chunk.embedding)
-                scored_chunks.append((chunk, similarity))
-            except Exception as e:
-                logger.error(f"Error computing similarity for chunk {chunk.id}: {e}")
-                continue
+    if matrix is None:
+        return []
     
-    if not scored_chunks:
+    query = np.asarray(query_embedding, dtype=np.float32)
+    if query.shape != (matrix.shape[1],):
+        logger.error(f"Query embedding has shape {query.shape}, expected ({matrix.shape[1]},)")
         return []
+    query = query / max(np.linalg.norm(query), 1e-12)
+    
+    if simsimd is not None:
+        # SIMD inner products against the unit-length query
+        products = simsimd.cdist(query[np.newaxis, :], matrix, metric="dot")
+        similarities = np.asarray(products, dtype=np.float32).ravel()
+    else:
+        similarities = matrix @ query
     
-    # Sort by similarity (highest first)
-    scored_chunks.sort(key=lambda x: x[1], reverse=True)
+    # Highest similarity first
+    top_indices = top_k_indices(similarities, top_k)
     
-    return scored_chunks[:top_k]
+    return [(chunks[i], float(similarities[i])) for i in top_indices]
+
+
+def retrieve_relevant_chunks_pgvector(
+    db: Session,
+    document_id: str,
+    query_embedding: List[float],
+    top_k: int
+) -> List[tuple]:
+    """
+    Retrieve top-k most relevant chunks inside PostgreSQL with pgvector's
+    inner product operator, so only the winning chunks leave the database
+    
+    Stored embeddings are unit length, so with a normalized query the inner
+    product is the cosine similarity.
+    
+    The document's chunks are materialized first and scored exactly. Ordering
+    the whole table by distance would let the planner use the global HNSW
+    index, which applies the document filter after the approximate scan and
+    can return fewer than top_k chunks.
+    
+    Returns: List of (chunk, similarity_score) tuples; empty when the
+    database returned fewer chunks than it should have
+    """
+    query = np.asarray(query_embedding, dtype=np.float32)
+    query = query / max(np.linalg.norm(query), 1e-12)
+    
+    candidates = select(
+        DocumentChunk,
+        func.count().over().label("embedded_count")
+    ).where(
+        DocumentChunk.document_id == document_id,
+        DocumentChunk.embedding.isnot(None)
+    ).cte("candidate_chunks").prefix_with("MATERIALIZED")
+    chunk = aliased(DocumentChunk, candidates)
+    
+    # max_inner_product yields the negated inner product, so ascending order is best first
+    distance = chunk.embedding.max_inner_product(query).label("distance")
+    
+    rows = db.query(chunk, distance, candidates.c.embedded_count).order_by(
+        distance
+    ).limit(top_k).all()
+    
+    embedded_count = rows[0].embedded_count if rows else 0
+    if len(rows) < min(top_k, embedded_count):
+        logger.warning(
+            f"pgvector returned {len(rows)} of {min(top_k, embedded_count)} chunks "
+            f"for document {document_id}"
+        )
+        return []
+    
+    return [(chunk, -float(chunk_distance)) for chunk, chunk_distance, _ in rows]
 
 
 def retrieve_relevant_chunks_tfidf(
     query: str,
     chunks: List[DocumentChunk],
-    top_k: int
+    top_k: int,
+    doc: Optional[Document] = None
 ) -> List[tuple]:
     """
-    Fallback retrieval using TF-IDF when embeddings are unavailable
+    Fallback retrieval using hashed term vectors when embeddings are unavailable
+    
+    Uses the chunk matrix persisted on the document at ingestion time.
+    Documents ingested before it existed are encoded on the fly; the hashing
+    vectorizer needs no fitting either way.
     
     Returns: List of (chunk, similarity_score) tuples
     """
@@ -135,33 +264,25 @@ def retrieve_relevant_chunks_tfidf(
         if not chunk_texts:
             return []
         
-        # Create TF-IDF vectorizer
-        vectorizer = TfidfVectorizer(
-            max_features=1000,
-            stop_words='english',
-            ngram_range=(1, 2)
-        )
-        
-        # Fit and transform
-        corpus = chunk_texts + [query]
-        tfidf_matrix = vectorizer.fit_transform(corpus)
+        chunk_vectors = None
+        if doc is not None and doc.tfidf_matrix:
+            chunk_vectors = tfidf_index.load_matrix(doc.tfidf_matrix)
+            if chunk_vectors.shape[0] != len(chunks):
+                logger.warning(f"Stored term index for document {doc.id} is stale, re-encoding")
+                chunk_vectors = None
         
-        # Query is the last vector
-        query_vector = tfidf_matrix[-1]
-        chunk_vectors = tfidf_matrix[:-1]
+        if chunk_vectors is None:
+            chunk_vectors = tfidf_index.encode(chunk_texts)
         
-        # Compute similarities
-        similarities = sklearn_cosine_similarity(query_vector, chunk_vectors).flatten()
+        query_vector = tfidf_index.encode([query])
         
-        # Create scored chunks
-        scored_chunks = []
-        for i, chunk in enumerate(chunks):
-            scored_chunks.append((chunk, float(similarities[i])))
+        # Rows are L2-normalized, so the sparse dot product is the cosine similarity
+        similarities = (chunk_vectors @ query_vector.T).toarray().ravel()
         
-        # Sort by similarity (highest first)
-        scored_chunks.sort(key=lambda x: x[1], reverse=True)
+        # Highest similarity first
+        top_indices = top_k_indices(similarities, top_k)
         
-        return scored_chunks[:top_k]
+        return [(chunks[i], float(similarities[i])) for i in top_indices]
         
     except Exception as e:
         logger.error(f"Error in TF-IDF retrieval: {e}")
@@ -202,28 +323,98 @@ def generate_embedding_with_retry(content: str, max_retries: int = 3, initial_de
     return None
 
 
-@router.post("/ask", response_model=AskResponse)
-def ask_about_contract(request: AskRequest, db: Session = Depends(get_db)):
+async def batch_generate_embeddings(texts: List[str], batch_size: int = EMBED_BATCH_SIZE) -> List[Optional[List[float]]]:
     """
-    Question answering grounded in uploaded documents (RAG)
+    Generate embeddings for many texts with one API call per batch
     
-    - **document_id**: UUID of the document to query
-    - **query**: Natural language question about the contract
-    - **top_k**: Number of relevant chunks to retrieve (1-20)
+    Batches are sent concurrently, at most EMBED_CONCURRENCY at a time. A failed
+    batch yields None for each of its texts; after a quota error the remaining
+    batches are skipped.
     
-    Returns answer with citations including page numbers and character ranges
+    Returns: One embedding (or None) per input text, in input order
     """
+    semaphore = asyncio.Semaphore(EMBED_CONCURRENCY)
+    quota_exceeded = False
     
-    # Check if Gemini is configured
-    if not GEMINI_API_KEY:
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="AI service not configured. GEMINI_API_KEY is missing."
-        )
+    async def embed_batch(batch: List[str]) -> List[Optional[List[float]]]:
+        nonlocal quota_exceeded
+        async with semaphore:
+            if quota_exceeded:
+                return [None] * len(batch)
+            try:
+                response = await asyncio.to_thread(
+                    genai.embed_content,
+                    model=EMBED_MODEL,
+                    content=batch
+                )
+                return response["embedding"]
+            except Exception as e:
+                error_str = str(e)
+                if "429" in error_str or "quota" in error_str.lower():
+                    logger.warning(f"Gemini API quota exceeded. Embeddings will be skipped for remaining batches.")
+                    quota_exceeded = True
+                else:
+                    logger.error(f"Failed to embed batch of {len(batch)} texts: {e}")
+                return [None] * len(batch)
+    
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    results = await asyncio.gather(*(embed_batch(batch) for batch in batches))
+    
+    return [embedding for batch_embeddings in results for embedding in batch_embeddings]
+
+
+def fetch_chunks(db: Session, document_id: str) -> List[Row]:
+    """
+    Load all chunks of a document in chunk order, with only the columns retrieval uses
+    
+    Plain rows rather than ORM objects, so they can be cached and shared
+    across requests without being tied to the session that loaded them.
+    """
+    return db.query(
+        DocumentChunk.id,
+        DocumentChunk.chunk_index,
+        DocumentChunk.chunk_text,
+        DocumentChunk.page_number,
+        DocumentChunk.char_start,
+        DocumentChunk.char_end,
+        DocumentChunk.embedding
+    ).filter(
+        DocumentChunk.document_id == document_id
+    ).order_by(DocumentChunk.chunk_index).all()
+
+
+def load_document_chunks(db: Session, document_id: str) -> Tuple[List[Row], List[Row], Optional[np.ndarray]]:
+    """
+    Chunk rows of a document with their embedding matrix, memoized per document
     
+    Returns: (all chunks, embedded chunks, embedding matrix or None)
+    """
+    with _chunk_cache_lock:
+        cached = _chunk_cache.get(document_id)
+    if cached is not None:
+        return cached
+    
+    chunks = fetch_chunks(db, document_id)
+    entry = (chunks, *build_embedding_matrix(chunks))
+    
+    if chunks:
+        with _chunk_cache_lock:
+            _chunk_cache[document_id] = entry
+    
+    return entry
+
+
+def invalidate_document_chunks(document_id: str) -> None:
+    """Drop a document's memoized chunks after its chunks were written"""
+    with _chunk_cache_lock:
+        _chunk_cache.pop(document_id, None)
+
+
+async def get_document(db: Session, document_id: str) -> Document:
+    """Validate the ID and load a document that has extracted text"""
     # Validate UUID format
     try:
-        uuid.UUID(request.document_id)
+        uuid.UUID(document_id)
     except ValueError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -232,7 +423,9 @@ def ask_about_contract(request: AskRequest, db: Session = Depends(get_db)):
     
     # Fetch document
     try:
-        doc = db.query(Document).filter(Document.id == request.document_id).first()
+        doc = await asyncio.to_thread(
+            lambda: db.query(Document).filter(Document.id == document_id).first()
+        )
     except SQLAlchemyError as e:
         logger.error(f"Database error fetching document: {e}")
         raise HTTPException(
@@ -243,7 +436,7 @@ def ask_about_contract(request: AskRequest, db: Session = Depends(get_db)):
     if not doc:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Document with ID {request.document_id} not found"
+            detail=f"Document with ID {document_id} not found"
         )
     
     if not doc.extracted_text:
@@ -252,62 +445,123 @@ def ask_about_contract(request: AskRequest, db: Session = Depends(get_db)):
             detail="Document has no extracted text"
         )
     
-    # Fetch chunks for this document
-    try:
-        chunks = db.query(DocumentChunk).filter(
-            DocumentChunk.document_id == request.document_id
-        ).order_by(DocumentChunk.chunk_index).all()
-    except SQLAlchemyError as e:
-        logger.error(f"Database error fetching chunks: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Database error occurred while fetching document chunks"
-        )
+    return doc
+
+
+async def embed_queries_and_load_chunks(
+    db: Session,
+    document_id: str,
+    queries: List[str]
+) -> Tuple[List[Optional[List[float]]], Optional[tuple]]:
+    """
+    Embed the queries; without pgvector, also load the document's chunks
     
-    if not chunks:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="No text chunks available for this document. Please re-ingest the document."
+    Without pgvector every chunk is scored in Python. That is the SQLite
+    setup, where every session shares one connection, so the chunks are
+    loaded before the embedding threads start rather than alongside them.
+    """
+    document_chunks = None
+    if not is_postgres:
+        try:
+            document_chunks = await asyncio.to_thread(load_document_chunks, db, document_id)
+        except SQLAlchemyError as e:
+            logger.error(f"Database error fetching chunks: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error occurred while fetching document chunks"
+            )
+    
+    query_embeddings = await asyncio.gather(*(
+        asyncio.to_thread(
+            embedding_cache.get_or_compute,
+            EMBED_MODEL,
+            query,
+            generate_embedding_with_retry
         )
+        for query in queries
+    ))
+    return list(query_embeddings), document_chunks
+
+
+async def find_relevant_chunks(
+    db: Session,
+    doc: Document,
+    query: str,
+    query_embedding: Optional[List[float]],
+    top_k: int,
+    document_chunks: Optional[tuple] = None
+) -> List[Tuple[DocumentChunk, float]]:
+    """Retrieve the top chunks for one query, falling back to TF-IDF without an embedding"""
+    use_tfidf_fallback = query_embedding is None
+    if use_tfidf_fallback:
+        logger.warning("Falling back to TF-IDF due to embedding API failure")
     
-    # Generate query embedding with retry logic
-    query_embedding = None
-    use_tfidf_fallback = False
+    # On PostgreSQL the nearest chunks are found by pgvector in the database
+    relevant_chunks = []
+    if is_postgres and not use_tfidf_fallback:
+        try:
+            relevant_chunks = await asyncio.to_thread(
+                retrieve_relevant_chunks_pgvector,
+                db,
+                doc.id,
+                query_embedding,
+                top_k
+            )
+            logger.info("Using pgvector retrieval method")
+        except SQLAlchemyError as e:
+            logger.error(f"Database error searching chunks: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error occurred while searching document chunks"
+            )
     
-    if GEMINI_API_KEY:
-        query_embedding = generate_embedding_with_retry(request.query)
+    if not relevant_chunks:
+        # Fetch chunks for this document
+        if document_chunks is None:
+            try:
+                document_chunks = await asyncio.to_thread(load_document_chunks, db, doc.id)
+            except SQLAlchemyError as e:
+                logger.error(f"Database error fetching chunks: {e}")
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail="Database error occurred while fetching document chunks"
+                )
         
-        if query_embedding is None:
-            logger.warning("Falling back to TF-IDF due to embedding API failure")
-            use_tfidf_fallback = True
-    else:
-        logger.warning("No Gemini API key, using TF-IDF fallback")
-        use_tfidf_fallback = True
-    
-    # Retrieve relevant chunks
-    try:
-        if use_tfidf_fallback:
-            # Use TF-IDF fallback
-            relevant_chunks = retrieve_relevant_chunks_tfidf(
-                request.query,
-                chunks,
-                request.top_k
+        chunks, embedded_chunks, matrix = document_chunks
+        
+        if not chunks:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No text chunks available for this document. Please re-ingest the document."
             )
-            logger.info("Using TF-IDF retrieval method")
-        else:
-            # Use embedding-based retrieval
-            relevant_chunks = retrieve_relevant_chunks(
-                query_embedding,
-                chunks,
-                request.top_k
+        
+        # Retrieve relevant chunks
+        try:
+            if use_tfidf_fallback:
+                # Use TF-IDF fallback
+                relevant_chunks = await asyncio.to_thread(
+                    retrieve_relevant_chunks_tfidf,
+                    query,
+                    chunks,
+                    top_k,
+                    doc
+                )
+                logger.info("Using TF-IDF retrieval method")
+            else:
+                # Use embedding-based retrieval
+                relevant_chunks = retrieve_relevant_chunks(
+                    query_embedding,
+                    embedded_chunks,
+                    top_k,
+                    matrix
+                )
+                logger.info("Using embedding-based retrieval method")
+        except Exception as e:
+            logger.error(f"Error retrieving relevant chunks: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Error retrieving relevant document chunks"
             )
-            logger.info("Using embedding-based retrieval method")
-    except Exception as e:
-        logger.error(f"Error retrieving relevant chunks: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error retrieving relevant document chunks"
-        )
     
     if not relevant_chunks:
         raise HTTPException(
@@ -315,18 +569,20 @@ def ask_about_contract(request: AskRequest, db: Session = Depends(get_db)):
             detail="No relevant chunks found for your query."
         )
     
-    # Build context from top chunks
-    context_parts = []
-    citations_data = []
-    
-    for chunk, score in relevant_chunks:
-        context_parts.append(f"[Chunk {chunk.chunk_index}]: {chunk.chunk_text}")
-        citations_data.append({
-            "chunk": chunk,
-            "score": score
-        })
-    
-    context = "\n\n".join(context_parts)
+    return relevant_chunks
+
+
+async def generate_answer(
+    document_id: str,
+    query: str,
+    relevant_chunks: List[Tuple[DocumentChunk, float]]
+) -> AskResponse:
+    """Ask Gemini to answer from the retrieved chunks and attach citations"""
+    # Build context from top chunks in a single join
+    context = "\n\n".join(
+        f"[Chunk {chunk.chunk_index}]: {chunk.chunk_text}"
+        for chunk, _ in relevant_chunks
+    )
     
     # Generate answer using Gemini
     prompt = f"""You are a legal AI assistant specialized in contract analysis. 
@@ -342,13 +598,12 @@ Important guidelines:
 Contract Context:
 {context}
 
-User Question: {request.query}
+User Question: {query}
 
 Provide a clear, well-structured answer:"""
     
     try:
-        model = genai.GenerativeModel(LLM_MODEL)
-        response = model.generate_content(prompt)
+        response = await asyncio.to_thread(model.generate_content, prompt)
         answer = response.text.strip()
     except Exception as e:
         logger.error(f"Gemini API error: {e}")
@@ -359,22 +614,96 @@ Provide a clear, well-structured answer:"""
     
     # Build citations
     citations = []
-    for i, cite_data in enumerate(citations_data):
-        chunk = cite_data["chunk"]
+    for chunk, score in relevant_chunks:
         citations.append(Citation(
-            document_id=request.document_id,
+            document_id=document_id,
             chunk_id=chunk.id,
             chunk_index=chunk.chunk_index,
             page=chunk.page_number,
             char_range=[chunk.char_start or 0, chunk.char_end or 0],
-            relevance_score=round(cite_data["score"], 4)
+            relevance_score=round(score, 4)
         ))
     
-    logger.info(f"Successfully answered query for document {request.document_id}")
-    
     return AskResponse(
         answer=answer,
         citations=citations,
-        query=request.query,
-        document_id=request.document_id
+        query=query,
+        document_id=document_id
     )
+
+
+@router.post("/ask", response_model=AskResponse)
+async def ask_about_contract(request: AskRequest, db: Session = Depends(get_db)):
+    """
+    Question answering grounded in uploaded documents (RAG)
+    
+    - **document_id**: UUID of the document to query
+    - **query**: Natural language question about the contract
+    - **top_k**: Number of relevant chunks to retrieve (1-20)
+    
+    Returns answer with citations including page numbers and character ranges
+    """
+    
+    # Check if Gemini is configured
+    if not GEMINI_API_KEY:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="AI service not configured. GEMINI_API_KEY is missing."
+        )
+    
+    doc = await get_document(db, request.document_id)
+    
+    (query_embedding,), document_chunks = await embed_queries_and_load_chunks(
+        db, request.document_id, [request.query]
+    )
+    relevant_chunks = await find_relevant_chunks(
+        db, doc, request.query, query_embedding, request.top_k, document_chunks
+    )
+    response = await generate_answer(request.document_id, request.query, relevant_chunks)
+    
+    logger.info(f"Successfully answered query for document {request.document_id}")
+    
+    return response
+
+
+@router.post("/ask/batch", response_model=AskBatchResponse)
+async def ask_batch_about_contract(request: AskBatchRequest, db: Session = Depends(get_db)):
+    """
+    Answer several questions about one document in a single request
+    
+    - **document_id**: UUID of the document to query
+    - **queries**: Natural language questions about the contract (1-10)
+    - **top_k**: Number of relevant chunks to retrieve per question (1-20)
+    
+    The document and its chunks are loaded once; queries are embedded and
+    answered concurrently. Returns one answer with citations per query, in order.
+    """
+    
+    # Check if Gemini is configured
+    if not GEMINI_API_KEY:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="AI service not configured. GEMINI_API_KEY is missing."
+        )
+    
+    doc = await get_document(db, request.document_id)
+    
+    query_embeddings, document_chunks = await embed_queries_and_load_chunks(
+        db, request.document_id, request.queries
+    )
+    
+    # Retrieval shares the request's session, so it runs one query at a time
+    relevant_chunks_per_query = []
+    for query, query_embedding in zip(request.queries, query_embeddings):
+        relevant_chunks_per_query.append(await find_relevant_chunks(
+            db, doc, query, query_embedding, request.top_k, document_chunks
+        ))
+    
+    results = await asyncio.gather(*(
+        generate_answer(request.document_id, query, relevant_chunks)
+        for query, relevant_chunks in zip(request.queries, relevant_chunks_per_query)
+    ))
+    
+    logger.info(f"Successfully answered {len(results)} queries for document {request.document_id}")
+    
+    return AskBatchResponse(document_id=request.document_id, results=list(results))
@@ -8,23 +8,30 @@ from typing import List, Optional, Dict, Any
 import google.generativeai as genai
 import os
 import logging
+import asyncio
 from dotenv import load_dotenv
 import uuid
+import json
 
 # Configure logging
 logger = logging.getLogger(__name__)
 load_dotenv()
 
-# Configure Gemini
+# Gemini itself is configured once at app startup (src/main.py)
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if not GEMINI_API_KEY:
     logger.warning("GEMINI_API_KEY not found - audit endpoint will not work")
-else:
-    genai.configure(api_key=GEMINI_API_KEY)
-    logger.info("Gemini API configured for audit endpoint")
 
 LLM_MODEL = "gemini-2.0-flash-exp"
 
+# Built once and shared by all requests
+model = genai.GenerativeModel(LLM_MODEL) if GEMINI_API_KEY else None
+
+# The contract is audited in windows of consecutive chunks, several at a time
+AUDIT_WINDOW_CHUNKS = 10
+AUDIT_WINDOW_CHARS = 16000  # Used when a document has no chunks
+AUDIT_CONCURRENCY = 4
+
 router = APIRouter()
 
 # ---------- Schemas ----------
@@ -55,10 +62,71 @@ class AuditResponse(BaseModel):
     findings: List[Finding]
 
 
+# ---------- Helpers ----------
+
+def build_audit_prompt(contract_text: str) -> str:
+    """Prompt asking Gemini for risky clauses in one window of contract text"""
+    return f"""
+You are a contract risk analysis AI assistant. Review the following contract text and detect potentially risky clauses.
+Return a structured JSON array where each finding has:
+- clause_type: The type of clause (e.g., "Auto-Renewal", "Liability", "Indemnity")
+- severity: One of ["low", "medium", "high"]
+- description: Why this clause is risky or noteworthy
+- evidence_text: The exact snippet or clause from the contract
+- suggestion: How to mitigate or modify the risk (optional)
+
+Focus especially on:
+1. Auto-renewal with less than 30 days notice
+2. Unlimited liability clauses
+3. Broad indemnity clauses
+4. Weak confidentiality terms
+5. Ambiguous termination terms
+
+Contract Text:
+{contract_text}
+
+Return strictly in JSON format (array of findings), no extra commentary.
+"""
+
+
+def parse_findings(raw_text: str) -> List[Finding]:
+    """Parse Gemini's JSON findings, falling back to a single plain-text finding"""
+    findings = []
+    try:
+        findings_data = json.loads(raw_text)
+        if isinstance(findings_data, dict):
+            findings_data = [findings_data]
+        for f in findings_data:
+            findings.append(Finding(**f))
+    except Exception as e:
+        logger.warning(f"Failed to parse structured JSON. Returning plain-text fallback. Error: {e}")
+        findings = [Finding(
+            clause_type="Unparsed",
+            severity="medium",
+            description="Could not parse structured output from Gemini.",
+            evidence_text=raw_text[:2000]
+        )]
+    return findings
+
+
+def merge_findings(window_findings: List[List[Finding]]) -> List[Finding]:
+    """Concatenate per-window findings, dropping repeats from overlapping windows"""
+    merged = []
+    seen = set()
+    for findings in window_findings:
+        for finding in findings:
+            key = (finding.clause_type.lower(), finding.evidence_text[:64])
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(finding)
+    return merged
+
+
 # ---------- Endpoint ----------
 
 @router.post("/audit", response_model=AuditResponse)
-def audit_contract(request: AuditRequest, db: Session = Depends(get_db)):
+async def audit_contract(request: AuditRequest, db: Session = Depends(get_db)):
     """
     Audit the given contract for risky or non-standard clauses.
     Example risks:
@@ -79,7 +147,9 @@ def audit_contract(request: AuditRequest, db: Session = Depends(get_db)):
 
     # Fetch document
     try:
-        doc = db.query(Document).filter(Document.id == request.document_id).first()
+        doc = await asyncio.to_thread(
+            lambda: db.query(Document).filter(Document.id == request.document_id).first()
+        )
     except SQLAlchemyError as e:
         logger.error(f"Database error fetching document: {e}")
         raise HTTPException(status_code=500, detail="Database error occurred")
@@ -90,74 +160,57 @@ def audit_contract(request: AuditRequest, db: Session = Depends(get_db)):
     if not doc.extracted_text:
         raise HTTPException(status_code=400, detail="Document has no extracted text")
 
-    # Fetch chunks (optional for context)
+    # Fetch chunks; the audit runs over windows of them (falls back to the raw text)
     try:
-        chunks = db.query(DocumentChunk).filter(
-            DocumentChunk.document_id == request.document_id
-        ).order_by(DocumentChunk.chunk_index).all()
+        chunks = await asyncio.to_thread(
+            # Plain rows with just the character ranges; embeddings are never needed here
+            lambda: db.query(DocumentChunk.char_start, DocumentChunk.char_end).filter(
+                DocumentChunk.document_id == request.document_id
+            ).order_by(DocumentChunk.chunk_index).all()
+        )
     except SQLAlchemyError as e:
         logger.error(f"Database error fetching chunks: {e}")
         chunks = []
 
-    # Combine all text for audit
-    contract_text = doc.extracted_text
-    if not contract_text and chunks:
-        contract_text = "\n".join([c.chunk_text for c in chunks])
-
-    if not contract_text:
-        raise HTTPException(status_code=400, detail="No text available for audit")
-
     if not GEMINI_API_KEY:
         raise HTTPException(status_code=503, detail="Gemini API not configured")
 
-    # Prompt
-    prompt = f"""
-You are a contract risk analysis AI assistant. Review the following contract text and detect potentially risky clauses.
-Return a structured JSON array where each finding has:
-- clause_type: The type of clause (e.g., "Auto-Renewal", "Liability", "Indemnity")
-- severity: One of ["low", "medium", "high"]
-- description: Why this clause is risky or noteworthy
-- evidence_text: The exact snippet or clause from the contract
-- suggestion: How to mitigate or modify the risk (optional)
-
-Focus especially on:
-1. Auto-renewal with less than 30 days notice
-2. Unlimited liability clauses
-3. Broad indemnity clauses
-4. Weak confidentiality terms
-5. Ambiguous termination terms
-
-Contract Text:
-{contract_text[:16000]}  # Limit prompt to avoid exceeding token limit
-
-Return strictly in JSON format (array of findings), no extra commentary.
-"""
-
-    try:
-        model = genai.GenerativeModel(LLM_MODEL)
-        response = model.generate_content(prompt)
-        raw_text = response.text.strip()
-    except Exception as e:
-        logger.error(f"Gemini API error during audit: {e}")
+    # Split the contract into windows so no clause is cut off by a prompt limit.
+    # Windows are sliced from the original text, so the overlap between
+    # neighbouring chunks is not repeated inside a window.
+    if chunks and all(c.char_start is not None and c.char_end is not None for c in chunks):
+        windows = []
+        for i in range(0, len(chunks), AUDIT_WINDOW_CHUNKS):
+            window = chunks[i:i + AUDIT_WINDOW_CHUNKS]
+            windows.append(doc.extracted_text[window[0].char_start:window[-1].char_end])
+    else:
+        contract_text = doc.extracted_text
+        windows = [
+            contract_text[i:i + AUDIT_WINDOW_CHARS]
+            for i in range(0, len(contract_text), AUDIT_WINDOW_CHARS)
+        ]
+
+    semaphore = asyncio.Semaphore(AUDIT_CONCURRENCY)
+
+    async def audit_window(window: str) -> Optional[List[Finding]]:
+        async with semaphore:
+            try:
+                response = await asyncio.to_thread(model.generate_content, build_audit_prompt(window))
+                raw_text = response.text.strip()
+            except Exception as e:
+                logger.error(f"Gemini API error during audit: {e}")
+                return None
+        return parse_findings(raw_text)
+
+    results = await asyncio.gather(*(audit_window(w) for w in windows))
+
+    window_findings = [r for r in results if r is not None]
+    if not window_findings:
         raise HTTPException(status_code=503, detail="AI service unavailable")
+    if len(window_findings) < len(windows):
+        logger.warning(f"Audit of {request.document_id} covers {len(window_findings)}/{len(windows)} windows")
 
-    # Try parsing JSON safely
-    import json
-    findings = []
-    try:
-        findings_data = json.loads(raw_text)
-        if isinstance(findings_data, dict):
-            findings_data = [findings_data]
-        for f in findings_data:
-            findings.append(Finding(**f))
-    except Exception as e:
-        logger.warning(f"Failed to parse structured JSON. Returning plain-text fallback. Error: {e}")
-        findings = [Finding(
-            clause_type="Unparsed",
-            severity="medium",
-            description="Could not parse structured output from Gemini.",
-            evidence_text=raw_text[:2000]
-        )]
+    findings = merge_findings(window_findings)
 
     return AuditResponse(
         document_id=request.document_id,
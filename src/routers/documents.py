@@ -0,0 +1,97 @@
+from fastapi import APIRouter, HTTPException, Depends, status
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+from src.db import get_db
+from src.models.documents import Document
+import logging
+import re
+import uuid
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+SHA256_HEX = re.compile(r"^[0-9a-f]{64}$")
+
+router = APIRouter(prefix="/documents", tags=["Documents"])
+
+
+@router.get("/by-hash/{content_hash}")
+def get_document_by_hash(content_hash: str, db: Session = Depends(get_db)):
+    """
+    Look up an ingested document by the SHA-256 of its file
+    
+    - **content_hash**: Lowercase hex SHA-256 of the PDF bytes
+    
+    Lets clients skip re-uploading a file the server already has.
+    """
+    content_hash = content_hash.lower()
+    if not SHA256_HEX.match(content_hash):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid content_hash. Must be a hex SHA-256 digest"
+        )
+    
+    try:
+        doc = db.query(Document.id, Document.filename, Document.uploaded_at).filter(
+            Document.content_hash == content_hash,
+            Document.status == "ingested"
+        ).order_by(Document.uploaded_at.desc()).first()
+    except SQLAlchemyError as e:
+        logger.error(f"Database error looking up document by hash: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error occurred"
+        )
+    
+    if not doc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No ingested document with this content hash"
+        )
+    
+    return {
+        "document_id": str(doc.id),
+        "filename": doc.filename,
+        "uploaded_at": doc.uploaded_at.isoformat() if doc.uploaded_at else None
+    }
+
+
+@router.get("/{document_id}")
+def get_document(document_id: str, db: Session = Depends(get_db)):
+    """
+    Basic metadata for one document
+    
+    - **document_id**: UUID of the document
+    """
+    # Validate UUID format
+    try:
+        uuid.UUID(document_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid document_id format. Must be a valid UUID"
+        )
+    
+    try:
+        doc = db.query(Document.id, Document.filename, Document.status, Document.uploaded_at).filter(
+            Document.id == document_id
+        ).first()
+    except SQLAlchemyError as e:
+        logger.error(f"Database error fetching document: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error occurred"
+        )
+    
+    if not doc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Document with ID {document_id} not found"
+        )
+    
+    return {
+        "document_id": str(doc.id),
+        "filename": doc.filename,
+        "status": doc.status,
+        "uploaded_at": doc.uploaded_at.isoformat() if doc.uploaded_at else None
+    }
@@ -1,15 +1,17 @@
 from fastapi import APIRouter, HTTPException, Depends, status
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from src.db import get_db
 from src.models.documents import Document, ExtractionResult
+from src.services import redis_cache
 from pydantic import BaseModel, Field
 import google.generativeai as genai
+from cachetools import LRUCache
 from dotenv import load_dotenv
 import os
-import json
+import orjson
+import threading
 import uuid
-import re
 import logging
 from typing import Optional, List, Dict, Any
 
@@ -20,15 +22,52 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
-# Configure Gemini only if API key is available
+# Gemini itself is configured once at app startup (src/main.py)
 if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
     model = genai.GenerativeModel("gemini-2.0-flash-exp")  # Using the latest model
-    logger.info("Gemini API configured successfully")
 else:
     model = None
     logger.warning("GEMINI_API_KEY not found - extraction endpoint will not work")
 
+# Bump when the extraction prompt changes so cached results are not reused
+EXTRACTION_PROMPT_VERSION = "v2"
+EXTRACTION_TOKEN_BUDGET = 12000  # Tokens of contract text per prompt
+# Only this many characters per budget token are ever sent to count_tokens;
+# Gemini averages about 4 characters per token on English text
+MAX_CHARS_PER_TOKEN = 6
+# The prefix search stops once it is this close (in characters) to the limit
+TOKEN_SEARCH_RESOLUTION = 500
+
+# Token-fitted prefix lengths by text hash, so a retried or re-uploaded
+# document is not counted again when Redis is not configured
+_prefix_lengths = LRUCache(maxsize=1024)
+_prefix_lengths_lock = threading.Lock()
+
+# Static instructions sent ahead of every contract. Kept as one fixed
+# prefix so the model sees identical leading tokens on each call
+EXTRACTION_INSTRUCTIONS = """You are a legal contract analyzer. Extract the following fields from the contract text below.
+Return ONLY valid JSON with no explanations, no markdown formatting, no code blocks.
+
+Required JSON structure:
+{
+  "parties": ["Party A name", "Party B name"],
+  "effective_date": "YYYY-MM-DD or descriptive text",
+  "term": "duration description",
+  "governing_law": "jurisdiction",
+  "payment_terms": "payment description",
+  "termination": "termination clause text",
+  "auto_renewal": true or false,
+  "confidentiality": "confidentiality clause text",
+  "indemnity": "indemnity clause text",
+  "liability_cap": {"amount": numeric_value, "currency": "USD"},
+  "signatories": [{"name": "Full Name", "title": "Title"}]
+}
+
+If a field is not found, use null. Be precise and extract exact text where applicable.
+
+Contract Text (may be truncated):
+"""
+
 # Router
 router = APIRouter()
 
@@ -70,10 +109,12 @@ class ExtractionResponse(BaseModel):
 
 
 def clean_gemini_response(text: str) -> str:
-    """Remove markdown code blocks and extra whitespace from Gemini response"""
-    # Remove ```json or ``` wrappers
-    text = re.sub(r'^```(?:json)?|```$', '', text.strip(), flags=re.MULTILINE)
-    return text.strip()
+    """Cut the JSON object out of a Gemini response, dropping markdown fences"""
+    start = text.find("{")
+    end = text.rfind("}")
+    if start == -1 or end < start:
+        return text.strip()
+    return text[start:end + 1]
 
 
 def validate_extraction_data(data: dict) -> dict:
@@ -122,6 +163,98 @@ def validate_extraction_data(data: dict) -> dict:
     return data
 
 
+def fit_to_token_budget(text: str, budget: int = EXTRACTION_TOKEN_BUDGET) -> str:
+    """Longest prefix of text that fits within budget tokens"""
+    # A token covers at least one character, so short texts always fit
+    if len(text) <= budget:
+        return text
+    
+    cache_key = redis_cache.make_key("extract_length", str(budget), text)
+    with _prefix_lengths_lock:
+        length = _prefix_lengths.get(cache_key)
+    if length is None:
+        length = redis_cache.get_json(cache_key)
+    if length is not None:
+        with _prefix_lengths_lock:
+            _prefix_lengths[cache_key] = length
+        return text[:length]
+    
+    try:
+        # Never count more than could possibly fit, so one long document does
+        # not turn into a multi-megabyte count_tokens request
+        length = min(len(text), budget * MAX_CHARS_PER_TOKEN)
+        tokens = model.count_tokens(text[:length]).total_tokens
+        if tokens > budget:
+            # Binary search between a prefix known to fit (a token covers at
+            # least one character) and one known not to. The first probe is
+            # the proportional estimate, which usually lands just under the budget.
+            fits, too_long = budget, length
+            probe = int(length * budget / tokens * 0.98)
+            while too_long - fits > TOKEN_SEARCH_RESOLUTION:
+                if not fits < probe < too_long:
+                    probe = (fits + too_long) // 2
+                tokens = model.count_tokens(text[:probe]).total_tokens
+                if tokens > budget:
+                    too_long = probe
+                    continue
+                fits = probe
+                if tokens >= budget * 0.98:
+                    break
+                probe = fits  # bisect from here on
+            length = fits
+    except Exception as e:
+        logger.warning(f"Token count failed, truncating by characters: {e}")
+        return text[:budget]
+    
+    with _prefix_lengths_lock:
+        _prefix_lengths[cache_key] = length
+    redis_cache.set_json(cache_key, length)
+    return text[:length]
+
+
+def run_extraction(contract_text: str) -> dict:
+    """Ask Gemini for the contract fields and return the validated data"""
+    # Create extraction prompt
+    prompt = f"""{EXTRACTION_INSTRUCTIONS}{contract_text}
+
+Return only the JSON object:"""
+    
+    # Send to Gemini
+    try:
+        response = model.generate_content(prompt)
+        text_response = response.text.strip()
+    except Exception as e:
+        logger.error(f"Gemini API error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="AI service temporarily unavailable. Please try again later."
+        )
+    
+    # Clean and parse response
+    clean_response = clean_gemini_response(text_response)
+    
+    try:
+        extracted_data = orjson.loads(clean_response)
+    except orjson.JSONDecodeError as e:
+        logger.error(f"Failed to parse Gemini response: {text_response[:500]}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to parse AI response. The model returned invalid JSON."
+        )
+    
+    # Validate and normalize data
+    try:
+        extracted_data = validate_extraction_data(extracted_data)
+    except Exception as e:
+        logger.error(f"Data validation error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to validate extracted data"
+        )
+    
+    return extracted_data
+
+
 @router.post("/extract", response_model=ExtractionResponse)
 def extract_fields(request: ExtractRequest, db: Session = Depends(get_db)):
     """
@@ -195,64 +328,16 @@ def extract_fields(request: ExtractRequest, db: Session = Depends(get_db)):
             signatories=existing_extraction.signatories
         )
     
-    # Create extraction prompt
-    prompt = f"""You are a legal contract analyzer. Extract the following fields from the contract text below.
-Return ONLY valid JSON with no explanations, no markdown formatting, no code blocks.
-
-Required JSON structure:
-{{
-  "parties": ["Party A name", "Party B name"],
-  "effective_date": "YYYY-MM-DD or descriptive text",
-  "term": "duration description",
-  "governing_law": "jurisdiction",
-  "payment_terms": "payment description",
-  "termination": "termination clause text",
-  "auto_renewal": true or false,
-  "confidentiality": "confidentiality clause text",
-  "indemnity": "indemnity clause text",
-  "liability_cap": {{"amount": numeric_value, "currency": "USD"}},
-  "signatories": [{{"name": "Full Name", "title": "Title"}}]
-}}
-
-If a field is not found, use null. Be precise and extract exact text where applicable.
-
-Contract Text (first 15000 characters):
-{doc.extracted_text[:15000]}
-
-Return only the JSON object:"""
+    # Identical contract text (e.g. a re-upload) reuses an earlier Gemini result
+    contract_text = fit_to_token_budget(doc.extracted_text)
+    cache_key = redis_cache.make_key("extract", EXTRACTION_PROMPT_VERSION, contract_text)
+    extracted_data = redis_cache.get_json(cache_key)
     
-    # Send to Gemini
-    try:
-        response = model.generate_content(prompt)
-        text_response = response.text.strip()
-    except Exception as e:
-        logger.error(f"Gemini API error: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="AI service temporarily unavailable. Please try again later."
-        )
-    
-    # Clean and parse response
-    clean_response = clean_gemini_response(text_response)
-    
-    try:
-        extracted_data = json.loads(clean_response)
-    except json.JSONDecodeError as e:
-        logger.error(f"Failed to parse Gemini response: {text_response[:500]}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to parse AI response. The model returned invalid JSON."
-        )
-    
-    # Validate and normalize data
-    try:
-        extracted_data = validate_extraction_data(extracted_data)
-    except Exception as e:
-        logger.error(f"Data validation error: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to validate extracted data"
-        )
+    if extracted_data is not None:
+        logger.info(f"Using cached Gemini extraction for document {request.document_id}")
+    else:
+        extracted_data = run_extraction(contract_text)
+        redis_cache.set_json(cache_key, extracted_data)
     
     # Store extraction result
     try:
@@ -279,6 +364,17 @@ Return only the JSON object:"""
         
         logger.info(f"Successfully extracted fields for document {request.document_id}")
         
+    except IntegrityError:
+        # A concurrent request stored this document's extraction first
+        db.rollback()
+        result = db.query(ExtractionResult).filter(
+            ExtractionResult.document_id == request.document_id
+        ).first()
+        if result is None:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to save extraction results"
+            )
     except SQLAlchemyError as e:
         db.rollback()
         logger.error(f"Database error saving extraction: {e}")
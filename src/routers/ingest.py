@@ -3,24 +3,29 @@ from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 import os
 import uuid
+import asyncio
+import hashlib
+import io
 import logging
 from datetime import datetime
-from typing import List
-import google.generativeai as genai
+from typing import List, Optional
+import numpy as np
+import aiofiles
 from dotenv import load_dotenv
 
 from src.db import get_db
 from src.models.documents import Document, DocumentChunk
-from src.utils.pdf_utils import extract_text_from_pdf
+from src.utils.pdf_utils import extract_pdf_text
+from src.routers.ask_route import batch_generate_embeddings, invalidate_document_chunks
+from src.services import embedding_cache, tfidf_index
 
 # Configure logging
 logger = logging.getLogger(__name__)
 load_dotenv()
 
-# Configure Gemini for embeddings
+# Gemini itself is configured once at app startup (src/main.py)
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
     EMBED_MODEL = "models/embedding-001"
 else:
     logger.warning("GEMINI_API_KEY not found - embedding functionality will be disabled")
@@ -33,6 +38,7 @@ os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 # Constants
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # Read uploads 1MB at a time
 ALLOWED_EXTENSIONS = {".pdf"}
 CHUNK_SIZE = 1000  # Characters per chunk
 CHUNK_OVERLAP = 200  # Overlap between chunks
@@ -58,34 +64,34 @@ def validate_file(file: UploadFile) -> None:
 
 def chunk_text(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> List[dict]:
     """Split text into overlapping chunks with metadata"""
-    chunks = []
     text_length = len(text)
     
-    if text_length == 0:
-        return chunks
-    
-    start = 0
-    chunk_index = 0
+    # Stop once a chunk reaches the end of the text, so the tail is not
+    # repeated as a run of ever-shorter overlap-only chunks
+    starts = range(0, max(text_length - overlap, 1), chunk_size - overlap) if text_length else []
     
-    while start < text_length:
-        end = min(start + chunk_size, text_length)
-        chunk_text = text[start:end]
-        
-        chunks.append({
-            "text": chunk_text,
+    return [
+        {
+            "text": text[start:start + chunk_size],
             "chunk_index": chunk_index,
             "char_start": start,
-            "char_end": end
-        })
-        
-        chunk_index += 1
-        start = end - overlap if end < text_length else text_length
-    
-    return chunks
+            "char_end": min(start + chunk_size, text_length)
+        }
+        for chunk_index, start in enumerate(starts)
+    ]
 
 
-def create_embeddings(chunks: List[dict]) -> List[dict]:
-    """Generate embeddings for text chunks using Gemini with error handling"""
+def normalize_embedding(embedding) -> np.ndarray:
+    """Scale an embedding to unit length so cosine similarity is a dot product"""
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        return vector
+    return vector / norm
+
+
+async def create_embeddings(chunks: List[dict]) -> List[dict]:
+    """Generate embeddings for text chunks using batched Gemini calls with error handling"""
     if not EMBED_MODEL:
         logger.warning("Embedding model not configured - skipping embeddings")
         return chunks
@@ -94,25 +100,45 @@ def create_embeddings(chunks: List[dict]) -> List[dict]:
     failed_count = 0
     
     try:
+        # Repeated boilerplate is embedded once and shared by every chunk with that text
+        groups = {}
         for chunk in chunks:
-            try:
-                response = genai.embed_content(
-                    model=EMBED_MODEL,
-                    content=chunk["text"]
-                )
-                chunk["embedding"] = response["embedding"]
-                embedded_count += 1
-            except Exception as e:
-                error_str = str(e)
-                # Check for quota errors
-                if "429" in error_str or "quota" in error_str.lower():
-                    logger.warning(f"Gemini API quota exceeded. Embeddings will be skipped for remaining chunks.")
-                    failed_count = len(chunks) - embedded_count
-                    break  # Stop trying if quota exceeded
-                else:
-                    logger.error(f"Failed to create embedding for chunk {chunk['chunk_index']}: {e}")
-                    failed_count += 1
-                    chunk["embedding"] = None
+            groups.setdefault(chunk["text"], []).append(chunk)
+        texts = list(groups)
+        
+        # Reuse embeddings of text seen before; only misses go to the API
+        cached = await asyncio.to_thread(embedding_cache.lookup_many, EMBED_MODEL, texts)
+        pending = []
+        for text, embedding in zip(texts, cached):
+            if embedding is not None:
+                embedding = normalize_embedding(embedding)
+                for chunk in groups[text]:
+                    chunk["embedding"] = embedding
+                embedded_count += len(groups[text])
+            else:
+                pending.append(text)
+        
+        if embedded_count > 0:
+            logger.info(f"Reused {embedded_count}/{len(chunks)} cached embeddings")
+        if len(texts) < len(chunks):
+            logger.info(f"Embedding {len(texts)} unique texts for {len(chunks)} chunks")
+        
+        # One API call per batch of texts instead of one per chunk
+        embeddings = await batch_generate_embeddings(pending)
+        
+        created = []
+        for text, embedding in zip(pending, embeddings):
+            if embedding is not None:
+                # Stored as unit-length float32 so retrieval only needs a dot product
+                embedding = normalize_embedding(embedding)
+                created.append((text, embedding))
+                embedded_count += len(groups[text])
+            else:
+                failed_count += len(groups[text])
+            for chunk in groups[text]:
+                chunk["embedding"] = embedding
+        
+        await asyncio.to_thread(embedding_cache.store_many, EMBED_MODEL, created)
         
         if embedded_count > 0:
             logger.info(f"Successfully created {embedded_count}/{len(chunks)} embeddings")
@@ -126,6 +152,209 @@ def create_embeddings(chunks: List[dict]) -> List[dict]:
         return chunks
 
 
+def discard_file(file_path: Optional[str]):
+    """Remove a saved upload that will not get a database row"""
+    if file_path and os.path.exists(file_path):
+        os.remove(file_path)
+
+
+async def prepare_upload(file: UploadFile) -> dict:
+    """
+    Validate, save, parse and embed one uploaded PDF
+    
+    Does not touch the database, so several uploads can be prepared
+    concurrently. PDF parsing runs in a worker thread. The saved file is
+    removed again if preparation fails or is cancelled.
+    """
+    file_path = None
+    try:
+        # Validate file
+        validate_file(file)
+        
+        # Generate unique ID
+        file_id = str(uuid.uuid4())
+        
+        # Save file
+        file_path = os.path.join(UPLOAD_DIR, f"{file_id}_{file.filename}")
+        
+        # Stream to disk, checking the size and hashing the bytes as we go
+        file_size = 0
+        content_hash = hashlib.sha256()
+        async with aiofiles.open(file_path, "wb") as f:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                file_size += len(chunk)
+                if file_size > MAX_FILE_SIZE:
+                    break
+                content_hash.update(chunk)
+                await f.write(chunk)
+        
+        if file_size > MAX_FILE_SIZE:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"File {file.filename} exceeds maximum size of 50MB"
+            )
+        
+        # Extract text
+        try:
+            pdf_data = await asyncio.to_thread(extract_pdf_text, file_path)
+            extracted_text = pdf_data["text"]
+            if not extracted_text or len(extracted_text.strip()) == 0:
+                raise ValueError("No text could be extracted from PDF")
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Failed to extract text from {file.filename}: {str(e)}"
+            )
+        
+        # Create chunks with embeddings before touching the session, so no
+        # transaction is held open while the embedding API is called
+        text_chunks = chunk_text(extracted_text)
+        chunks_with_embeddings = await create_embeddings(text_chunks)
+        
+        return {
+            "file_id": file_id,
+            "filename": file.filename,
+            "file_size": file_size,
+            "content_hash": content_hash.hexdigest(),
+            "file_path": file_path,
+            "extracted_text": extracted_text,
+            "num_pages": pdf_data["metadata"]["num_pages"],
+            "chunks": chunks_with_embeddings,
+            # Encode the fallback term index once here instead of on every query
+            "tfidf_matrix": tfidf_index.dump_matrix(
+                tfidf_index.encode([chunk_data["text"] for chunk_data in text_chunks])
+            )
+        }
+        
+    except (HTTPException, asyncio.CancelledError):
+        discard_file(file_path)
+        raise
+    except Exception as e:
+        discard_file(file_path)
+        logger.error(f"Unexpected error processing {file.filename}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to process {file.filename}: {str(e)}"
+        )
+
+
+COPY_COLUMNS = ("id", "document_id", "chunk_text", "chunk_index", "char_start", "char_end", "embedding")
+COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def copy_value(value) -> str:
+    """Format one value for PostgreSQL's COPY text format"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, np.ndarray):
+        return "[" + ",".join(map(str, value.tolist())) + "]"
+    return str(value).translate(COPY_ESCAPES)
+
+
+def copy_chunks(db: Session, rows: List[dict]) -> None:
+    """Stream chunk rows into PostgreSQL with COPY inside the session's transaction"""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(copy_value(row[column]) for column in COPY_COLUMNS))
+        buffer.write("\n")
+    buffer.seek(0)
+    
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {DocumentChunk.__tablename__} ({', '.join(COPY_COLUMNS)}) FROM STDIN",
+            buffer
+        )
+    finally:
+        cursor.close()
+
+
+def store_upload(db: Session, upload: dict) -> None:
+    """Add a prepared upload's document and chunks to the current transaction"""
+    file_id = upload["file_id"]
+    
+    # Create document record
+    doc = Document(
+        id=file_id,
+        filename=upload["filename"],
+        file_size=upload["file_size"],
+        content_hash=upload["content_hash"],
+        extracted_text=upload["extracted_text"],
+        status="processing",
+        document_metadata={
+            "path": upload["file_path"],
+            "upload_timestamp": datetime.utcnow().isoformat(),
+            "original_filename": upload["filename"],
+            "num_pages": upload["num_pages"]
+        },
+        tfidf_matrix=upload["tfidf_matrix"]
+    )
+    
+    db.add(doc)
+    db.flush()  # Get the ID without committing
+    
+    # Store chunks in database in one round trip
+    rows = [
+        {
+            "id": str(uuid.uuid4()),
+            "document_id": file_id,
+            "chunk_text": chunk_data["text"],
+            "chunk_index": chunk_data["chunk_index"],
+            "char_start": chunk_data["char_start"],
+            "char_end": chunk_data["char_end"],
+            "embedding": chunk_data.get("embedding")
+        }
+        for chunk_data in upload["chunks"]
+    ]
+    if db.get_bind().dialect.name == "postgresql":
+        copy_chunks(db, rows)
+    else:
+        db.bulk_insert_mappings(DocumentChunk, rows)
+    
+    # Update document status
+    doc.status = "ingested"
+    db.flush()
+
+
+def store_uploads(db: Session, uploads: List[dict]) -> List[dict]:
+    """
+    Write all prepared uploads in a single transaction
+    
+    Each file gets its own SAVEPOINT, so a database error rolls back only
+    that file; everything else is committed once at the end.
+    """
+    processing_details = []
+    
+    for upload in uploads:
+        try:
+            with db.begin_nested():
+                store_upload(db, upload)
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while processing {upload['filename']}: {e}")
+            discard_file(upload["file_path"])
+            processing_details.append({
+                "filename": upload["filename"],
+                "status": "failed",
+                "error": "Database error"
+            })
+            continue
+        
+        processing_details.append({
+            "document_id": upload["file_id"],
+            "filename": upload["filename"],
+            "file_size": upload["file_size"],
+            "text_length": len(upload["extracted_text"]),
+            "chunks_created": len(upload["chunks"]),
+            "status": "success"
+        })
+    
+    db.commit()
+    for detail in processing_details:
+        if detail["status"] == "success":
+            invalidate_document_chunks(detail["document_id"])
+    return processing_details
+
+
 @router.post("/")
 async def ingest_pdfs(
     files: List[UploadFile] = File(...),
@@ -152,112 +381,44 @@ async def ingest_pdfs(
             detail="Maximum 10 files allowed per request"
         )
     
-    document_ids = []
-    processing_details = []
+    # Parse and embed all files concurrently; the session is not thread-safe,
+    # so database writes happen afterwards, one file at a time
+    tasks = [asyncio.create_task(prepare_upload(file)) for file in files]
+    try:
+        uploads = await asyncio.gather(*tasks)
+    except BaseException:
+        # One file failed: stop the others and remove the files already
+        # prepared, then report the first error
+        for task in tasks:
+            task.cancel()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for result in results:
+            if isinstance(result, dict):
+                discard_file(result["file_path"])
+        raise
     
-    for file in files:
-        try:
-            # Validate file
-            validate_file(file)
-            
-            # Generate unique ID
-            file_id = str(uuid.uuid4())
-            
-            # Save file
-            file_path = os.path.join(UPLOAD_DIR, f"{file_id}_{file.filename}")
-            file_content = await file.read()
-            
-            # Check file size
-            file_size = len(file_content)
-            if file_size > MAX_FILE_SIZE:
-                raise HTTPException(
-                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                    detail=f"File {file.filename} exceeds maximum size of 50MB"
-                )
-            
-            with open(file_path, "wb") as f:
-                f.write(file_content)
-            
-            # Extract text
-            try:
-                extracted_text = extract_text_from_pdf(file_path)
-                if not extracted_text or len(extracted_text.strip()) == 0:
-                    raise ValueError("No text could be extracted from PDF")
-            except Exception as e:
-                # Clean up file
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-                raise HTTPException(
-                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                    detail=f"Failed to extract text from {file.filename}: {str(e)}"
-                )
-            
-            # Create document record
-            doc = Document(
-                id=file_id,
-                filename=file.filename,
-                file_size=file_size,
-                extracted_text=extracted_text,
-                status="processing",
-                document_metadata={
-                    "path": file_path,
-                    "upload_timestamp": datetime.utcnow().isoformat(),
-                    "original_filename": file.filename
-                }
-            )
-            
-            db.add(doc)
-            db.flush()  # Get the ID without committing
-            
-            # Create chunks with embeddings
-            text_chunks = chunk_text(extracted_text)
-            chunks_with_embeddings = create_embeddings(text_chunks)
-            
-            # Store chunks in database
-            for chunk_data in chunks_with_embeddings:
-                chunk = DocumentChunk(
-                    id=str(uuid.uuid4()),
-                    document_id=file_id,
-                    chunk_text=chunk_data["text"],
-                    chunk_index=chunk_data["chunk_index"],
-                    char_start=chunk_data["char_start"],
-                    char_end=chunk_data["char_end"],
-                    embedding=chunk_data.get("embedding")
-                )
-                db.add(chunk)
-            
-            # Update document status
-            doc.status = "ingested"
-            db.commit()
-            
-            document_ids.append(file_id)
-            processing_details.append({
-                "document_id": file_id,
-                "filename": file.filename,
-                "file_size": file_size,
-                "text_length": len(extracted_text),
-                "chunks_created": len(text_chunks),
-                "status": "success"
-            })
-            
-            logger.info(f"Successfully ingested {file.filename} with ID {file_id}")
-            
-        except HTTPException:
-            raise
-        except SQLAlchemyError as e:
-            db.rollback()
-            logger.error(f"Database error while processing {file.filename}: {e}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Database error while processing {file.filename}"
-            )
-        except Exception as e:
-            db.rollback()
-            logger.error(f"Unexpected error processing {file.filename}: {e}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to process {file.filename}: {str(e)}"
-            )
+    try:
+        processing_details = await asyncio.to_thread(store_uploads, db, uploads)
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.error(f"Database error while committing uploads: {e}")
+        for upload in uploads:
+            discard_file(upload["file_path"])
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error while saving uploaded files"
+        )
+    
+    document_ids = [
+        detail["document_id"] for detail in processing_details if detail["status"] == "success"
+    ]
+    if not document_ids:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error while saving uploaded files"
+        )
+    
+    logger.info(f"Successfully ingested {len(document_ids)}/{len(uploads)} file(s)")
     
     return {
         "message": f"Successfully ingested {len(document_ids)} file(s)",
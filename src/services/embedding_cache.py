@@ -0,0 +1,149 @@
+"""
+Embedding cache keyed by SHA-256 of the model name and the exact text.
+
+Lookups go through an in-process LRU first, then Redis when configured and
+finally the embedding_cache table, so repeated queries and re-ingested text
+skip the Gemini API.
+
+The table is only used on PostgreSQL. SQLite runs on a single shared
+connection (StaticPool), and a separate cache session committing on it would
+end whatever transaction the request's own session has open.
+"""
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.db import SessionLocal, is_postgres
+from src.models.documents import EmbeddingCache
+from src.services import redis_cache
+
+logger = logging.getLogger(__name__)
+
+MEMORY_CACHE_SIZE = 1024
+REDIS_PREFIX = "embedding:"
+
+_memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+_memory_lock = threading.Lock()
+
+
+def cache_key(model: str, text: str) -> str:
+    """
+    SHA-256 of model name and text
+    
+    The text is hashed exactly as it is embedded; folding case or whitespace
+    would hand one variant's embedding to another depending on which came first.
+    """
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+def _memory_get(key: str) -> Optional[np.ndarray]:
+    with _memory_lock:
+        embedding = _memory.get(key)
+        if embedding is not None:
+            _memory.move_to_end(key)
+        return embedding
+
+
+def _memory_put(key: str, embedding: np.ndarray) -> None:
+    with _memory_lock:
+        _memory[key] = embedding
+        _memory.move_to_end(key)
+        while len(_memory) > MEMORY_CACHE_SIZE:
+            _memory.popitem(last=False)
+
+
+def _load(keys: List[str]) -> Dict[str, np.ndarray]:
+    """Fetch stored embeddings for the given keys in one query"""
+    if not keys or not is_postgres:
+        return {}
+    
+    db = SessionLocal()
+    try:
+        rows = db.query(EmbeddingCache.hash, EmbeddingCache.embedding).filter(
+            EmbeddingCache.hash.in_(keys)
+        ).all()
+        return {key: np.frombuffer(blob, dtype=np.float32) for key, blob in rows}
+    except SQLAlchemyError as e:
+        logger.warning(f"Embedding cache lookup failed: {e}")
+        return {}
+    finally:
+        db.close()
+
+
+def _store(model: str, entries: Dict[str, np.ndarray]) -> None:
+    """Persist embeddings, ignoring keys another worker stored first"""
+    if not entries or not is_postgres:
+        return
+    
+    stmt = pg_insert(EmbeddingCache).values([
+        {"hash": key, "model": model, "embedding": embedding.tobytes()}
+        for key, embedding in entries.items()
+    ]).on_conflict_do_nothing(index_elements=["hash"])
+    
+    db = SessionLocal()
+    try:
+        db.execute(stmt)
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.warning(f"Embedding cache write failed: {e}")
+    finally:
+        db.close()
+
+
+def lookup_many(model: str, texts: Iterable[str]) -> List[Optional[np.ndarray]]:
+    """Return the cached embedding for each text, or None where there is none"""
+    keys = [cache_key(model, text) for text in texts]
+    found = {key: embedding for key in keys if (embedding := _memory_get(key)) is not None}
+    
+    missing = [key for key in set(keys) if key not in found]
+    shared = {
+        key: np.frombuffer(blob, dtype=np.float32)
+        for key, blob in zip(missing, redis_cache.get_many([REDIS_PREFIX + key for key in missing]))
+        if blob is not None
+    }
+    
+    stored = _load([key for key in missing if key not in shared])
+    redis_cache.set_many({REDIS_PREFIX + key: embedding.tobytes() for key, embedding in stored.items()})
+    
+    for key, embedding in {**shared, **stored}.items():
+        _memory_put(key, embedding)
+        found[key] = embedding
+    
+    return [found.get(key) for key in keys]
+
+
+def store_many(model: str, items: Iterable[Tuple[str, List[float]]]) -> None:
+    """Cache (text, embedding) pairs in memory, Redis and the database"""
+    entries = {}
+    for text, embedding in items:
+        key = cache_key(model, text)
+        embedding = np.asarray(embedding, dtype=np.float32)
+        _memory_put(key, embedding)
+        entries[key] = embedding
+    redis_cache.set_many({REDIS_PREFIX + key: embedding.tobytes() for key, embedding in entries.items()})
+    _store(model, entries)
+
+
+def get_or_compute(
+    model: str,
+    text: str,
+    compute: Callable[[str], Optional[List[float]]]
+) -> Optional[np.ndarray]:
+    """Return the cached embedding for text, computing and caching it on a miss"""
+    cached = lookup_many(model, [text])[0]
+    if cached is not None:
+        return cached
+    
+    embedding = compute(text)
+    if embedding is None:
+        return None
+    
+    store_many(model, [(text, embedding)])
+    return np.asarray(embedding, dtype=np.float32)
@@ -0,0 +1,91 @@
+"""
+Optional Redis cache in front of Gemini calls.
+
+Enabled by setting REDIS_URL. When Redis is not configured, not installed or
+unreachable every lookup is a miss and writes are dropped, so callers never
+need to handle cache errors.
+"""
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+_client = None
+
+
+def get_client():
+    """Shared Redis client, or None when caching is disabled"""
+    global _client
+    if _client is None and settings.REDIS_URL and redis is not None:
+        _client = redis.Redis.from_url(
+            settings.REDIS_URL,
+            socket_timeout=0.5,
+            socket_connect_timeout=0.5
+        )
+    return _client
+
+
+def make_key(namespace: str, *parts: str) -> str:
+    """Namespaced SHA-256 key over the given parts"""
+    digest = hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+    return f"{namespace}:{digest}"
+
+
+def get_json(key: str) -> Optional[Any]:
+    """Cached JSON value for key, or None on a miss or error"""
+    client = get_client()
+    if client is None:
+        return None
+    try:
+        value = client.get(key)
+        return orjson.loads(value) if value is not None else None
+    except Exception as e:
+        logger.warning(f"Redis lookup failed: {e}")
+        return None
+
+
+def set_json(key: str, value: Any, ttl: int = None) -> None:
+    """Cache a JSON-serializable value for ttl seconds"""
+    client = get_client()
+    if client is None:
+        return
+    try:
+        client.setex(key, ttl or settings.CACHE_TTL_SECONDS, orjson.dumps(value))
+    except Exception as e:
+        logger.warning(f"Redis write failed: {e}")
+
+
+def get_many(keys: List[str]) -> List[Optional[bytes]]:
+    """Raw cached values for keys in one round-trip, None where missing"""
+    client = get_client()
+    if client is None or not keys:
+        return [None] * len(keys)
+    try:
+        return client.mget(keys)
+    except Exception as e:
+        logger.warning(f"Redis lookup failed: {e}")
+        return [None] * len(keys)
+
+
+def set_many(values: Dict[str, bytes], ttl: int = None) -> None:
+    """Cache raw values in one pipelined round-trip"""
+    client = get_client()
+    if client is None or not values:
+        return
+    try:
+        pipe = client.pipeline(transaction=False)
+        for key, value in values.items():
+            pipe.setex(key, ttl or settings.CACHE_TTL_SECONDS, value)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Redis write failed: {e}")
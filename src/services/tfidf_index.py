@@ -0,0 +1,44 @@
+"""
+Per-document term index used for retrieval when embeddings are unavailable.
+
+Terms are mapped to features with a HashingVectorizer, so there is no
+vocabulary to fit or store: the same stateless vectorizer encodes chunks at
+ingestion and queries at request time. Only the sparse chunk matrix is kept
+on the document.
+"""
+import io
+import logging
+from typing import List
+
+import scipy.sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+
+logger = logging.getLogger(__name__)
+
+HASHING_PARAMS = {
+    "n_features": 2 ** 18,
+    "ngram_range": (1, 2),
+    "stop_words": "english",
+    "norm": "l2",
+    "alternate_sign": False,
+}
+
+# Stateless, so a single instance is shared by ingestion and queries
+vectorizer = HashingVectorizer(**HASHING_PARAMS)
+
+
+def encode(texts: List[str]) -> scipy.sparse.csr_matrix:
+    """L2-normalized hashed term vectors, one row per text"""
+    return vectorizer.transform(texts)
+
+
+def dump_matrix(matrix: scipy.sparse.csr_matrix) -> bytes:
+    """Serialize a chunk matrix for storage on the document"""
+    buffer = io.BytesIO()
+    scipy.sparse.save_npz(buffer, matrix.tocsr())
+    return buffer.getvalue()
+
+
+def load_matrix(data: bytes) -> scipy.sparse.csr_matrix:
+    """Deserialize a chunk matrix stored by dump_matrix"""
+    return scipy.sparse.load_npz(io.BytesIO(data))
@@ -0,0 +1,39 @@
+"""
+Shared pytest setup: a throwaway SQLite database and a dummy Gemini key,
+set before the application modules read their settings
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test.db"
+os.environ["GEMINI_API_KEY"] = "test-key"
+os.environ.pop("REDIS_URL", None)
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.config import Base
+from src.db import SessionLocal, engine
+from src.main import app
+
+
+@pytest.fixture
+def db():
+    """Session on freshly created tables, dropped again after the test"""
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def client(db):
+    """Test client for the app; the lifespan (Gemini setup) is not run"""
+    return TestClient(app)
@@ -0,0 +1,127 @@
+"""
+Tests for chunk ranking and the batch ask endpoint
+
+Gemini is replaced with deterministic fakes, so no API calls are made.
+"""
+import time
+import uuid
+
+import numpy as np
+import pytest
+
+from src.models.documents import EMBEDDING_DIM, Document, DocumentChunk
+from src.routers import ask_route
+from src.routers.ask_route import top_k_indices
+
+
+def test_top_k_indices_highest_first():
+    scores = np.array([0.1, 0.9, 0.5, 0.7])
+    
+    assert top_k_indices(scores, 2).tolist() == [1, 3]
+
+
+def test_top_k_indices_k_at_least_n_returns_all():
+    scores = np.array([0.2, 0.8, 0.5])
+    
+    assert top_k_indices(scores, 3).tolist() == [1, 2, 0]
+    assert top_k_indices(scores, 10).tolist() == [1, 2, 0]
+
+
+def test_top_k_indices_empty():
+    assert top_k_indices(np.array([]), 5).tolist() == []
+    assert top_k_indices(np.array([0.3]), 0).tolist() == []
+
+
+def test_top_k_indices_ties():
+    scores = np.array([0.5, 0.9, 0.5, 0.1, 0.9])
+    
+    # Tied scores keep their index order
+    assert top_k_indices(scores, 4).tolist() == [1, 4, 0, 2]
+    
+    # A tie across the cut-off still yields k of the highest scores
+    top = top_k_indices(scores, 3)
+    assert len(top) == 3
+    assert top[:2].tolist() == [1, 4]
+    assert scores[top[2]] == 0.5
+
+
+def unit_vector(seed):
+    vector = np.random.default_rng(seed).random(EMBEDDING_DIM).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+class FakeModel:
+    """Answers with the question it was asked; earlier questions answer slowest"""
+    
+    def generate_content(self, prompt):
+        query = prompt.split("User Question: ")[1].split("\n")[0]
+        time.sleep(0.05 * (3 - int(query[-1])))
+        
+        class Response:
+            text = f"answer to {query}"
+        return Response()
+
+
+@pytest.fixture
+def document_id(db):
+    document_id = str(uuid.uuid4())
+    db.add(Document(id=document_id, filename="contract.pdf", extracted_text="Contract text", status="ingested"))
+    for i in range(4):
+        db.add(DocumentChunk(
+            document_id=document_id,
+            chunk_text=f"Clause {i}",
+            chunk_index=i,
+            char_start=i * 10,
+            char_end=i * 10 + 8,
+            embedding=unit_vector(i)
+        ))
+    db.commit()
+    return document_id
+
+
+@pytest.fixture
+def fake_gemini(monkeypatch):
+    monkeypatch.setattr(ask_route, "model", FakeModel())
+    monkeypatch.setattr(
+        ask_route.genai,
+        "embed_content",
+        lambda model, content: {"embedding": unit_vector(len(content)).tolist()}
+    )
+
+
+def test_ask_batch_answers_each_query_in_order(client, document_id, fake_gemini):
+    queries = ["What is question 0", "What is question 1", "What is question 2"]
+    
+    response = client.post("/api/ask/batch", json={
+        "document_id": document_id,
+        "queries": queries,
+        "top_k": 2
+    })
+    
+    assert response.status_code == 200
+    body = response.json()
+    assert body["document_id"] == document_id
+    assert [result["query"] for result in body["results"]] == queries
+    assert [result["answer"] for result in body["results"]] == [f"answer to {query}" for query in queries]
+    for result in body["results"]:
+        assert len(result["citations"]) == 2
+        scores = [citation["relevance_score"] for citation in result["citations"]]
+        assert scores == sorted(scores, reverse=True)
+
+
+def test_ask_batch_unknown_document_is_404(client, db, fake_gemini):
+    response = client.post("/api/ask/batch", json={
+        "document_id": str(uuid.uuid4()),
+        "queries": ["What is question 0"]
+    })
+    
+    assert response.status_code == 404
+
+
+def test_ask_batch_rejects_too_many_queries(client, document_id, fake_gemini):
+    response = client.post("/api/ask/batch", json={
+        "document_id": document_id,
+        "queries": [f"What is question {i}" for i in range(11)]
+    })
+    
+    assert response.status_code == 422
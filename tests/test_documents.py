@@ -0,0 +1,84 @@
+"""
+Tests for the document lookup endpoints used to skip re-uploads
+"""
+import hashlib
+import uuid
+
+from src.models.documents import Document
+
+CONTENT_HASH = hashlib.sha256(b"%PDF-1.4 contract").hexdigest()
+
+
+def add_document(db, status="ingested", content_hash=CONTENT_HASH):
+    document_id = str(uuid.uuid4())
+    db.add(Document(
+        id=document_id,
+        filename="contract.pdf",
+        content_hash=content_hash,
+        status=status
+    ))
+    db.commit()
+    return document_id
+
+
+def test_by_hash_returns_ingested_document(client, db):
+    document_id = add_document(db)
+    
+    response = client.get(f"/api/documents/by-hash/{CONTENT_HASH}")
+    
+    assert response.status_code == 200
+    assert response.json()["document_id"] == document_id
+    assert response.json()["filename"] == "contract.pdf"
+
+
+def test_by_hash_accepts_uppercase_digest(client, db):
+    document_id = add_document(db)
+    
+    response = client.get(f"/api/documents/by-hash/{CONTENT_HASH.upper()}")
+    
+    assert response.status_code == 200
+    assert response.json()["document_id"] == document_id
+
+
+def test_by_hash_unknown_hash_is_404(client, db):
+    add_document(db)
+    
+    response = client.get(f"/api/documents/by-hash/{'0' * 64}")
+    
+    assert response.status_code == 404
+
+
+def test_by_hash_skips_documents_not_yet_ingested(client, db):
+    add_document(db, status="processing")
+    
+    response = client.get(f"/api/documents/by-hash/{CONTENT_HASH}")
+    
+    assert response.status_code == 404
+
+
+def test_by_hash_rejects_malformed_hash(client, db):
+    response = client.get("/api/documents/by-hash/not-a-hash")
+    
+    assert response.status_code == 400
+
+
+def test_by_id_returns_document(client, db):
+    document_id = add_document(db)
+    
+    response = client.get(f"/api/documents/{document_id}")
+    
+    assert response.status_code == 200
+    assert response.json()["document_id"] == document_id
+    assert response.json()["status"] == "ingested"
+
+
+def test_by_id_unknown_document_is_404(client, db):
+    response = client.get(f"/api/documents/{uuid.uuid4()}")
+    
+    assert response.status_code == 404
+
+
+def test_by_id_rejects_malformed_id(client, db):
+    response = client.get("/api/documents/not-a-uuid")
+    
+    assert response.status_code == 400
@@ -0,0 +1,123 @@
+"""
+Regression tests for migrate_to_postgres.py against older SQLite databases
+
+Run with: pytest tests/test_migrate_to_postgres.py
+"""
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+import migrate_to_postgres
+from migrate_to_postgres import _copy_field, _stream_table
+from src.config import Base
+from src.models.documents import Document, ExtractionResult
+
+# Schema of a database created before the tfidf_matrix (008) and
+# content_hash (013) columns existed, as in the bundled contracts.db
+BASELINE_SCHEMA = (
+    """CREATE TABLE documents (
+        id VARCHAR NOT NULL,
+        filename VARCHAR NOT NULL,
+        file_size INTEGER,
+        uploaded_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+        status VARCHAR,
+        extracted_text TEXT,
+        document_metadata JSON,
+        PRIMARY KEY (id)
+    )""",
+    """CREATE TABLE extraction_results (
+        id VARCHAR NOT NULL,
+        document_id VARCHAR NOT NULL,
+        parties JSON,
+        effective_date VARCHAR,
+        term VARCHAR,
+        governing_law VARCHAR,
+        payment_terms VARCHAR,
+        termination VARCHAR,
+        auto_renewal VARCHAR,
+        confidentiality VARCHAR,
+        indemnity VARCHAR,
+        liability_cap JSON,
+        signatories JSON,
+        confidence_score FLOAT,
+        created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+        PRIMARY KEY (id)
+    )""",
+)
+
+
+def make_baseline_db(path):
+    """SQLite database with the baseline schema and one document"""
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        for statement in BASELINE_SCHEMA:
+            conn.execute(text(statement))
+        conn.execute(text(
+            "INSERT INTO documents (id, filename, file_size, status, extracted_text, document_metadata) "
+            "VALUES ('doc-1', 'contract.pdf', 1024, 'processed', 'Text', '{\"num_pages\": 2}')"
+        ))
+        conn.execute(text(
+            "INSERT INTO extraction_results (id, document_id, parties, confidence_score) "
+            "VALUES ('ext-1', 'doc-1', '[\"Acme\"]', 0.9)"
+        ))
+    return engine
+
+
+def stream_tables(source, tmp_path, monkeypatch):
+    """Run both tables through _stream_table; returns the rows handed to COPY"""
+    target = create_engine(f"sqlite:///{tmp_path / 'target.db'}")
+    Base.metadata.create_all(target, tables=[Document.__table__, ExtractionResult.__table__])
+    
+    copied = {"documents": [], "extraction_results": []}
+    
+    def record_rows(postgres_session, model, mappings, skip_existing=False):
+        copied[model.__tablename__].extend(mappings)
+        return len(mappings)
+    
+    monkeypatch.setattr(migrate_to_postgres, "copy_rows", record_rows)
+    
+    sqlite_session = sessionmaker(bind=source)()
+    target_session = sessionmaker(bind=target)()
+    try:
+        _stream_table(sqlite_session, target_session, Document, "documents")
+        _stream_table(sqlite_session, target_session, ExtractionResult, "extraction results")
+    finally:
+        sqlite_session.close()
+        target_session.close()
+    return copied
+
+
+def test_migrates_baseline_schema(tmp_path, monkeypatch):
+    copied = stream_tables(make_baseline_db(tmp_path / "source.db"), tmp_path, monkeypatch)
+    
+    assert len(copied["documents"]) == 1
+    document = copied["documents"][0]
+    assert document["id"] == "doc-1"
+    assert document["document_metadata"] == {"num_pages": 2}
+    assert "content_hash" not in document
+    assert "tfidf_matrix" not in document
+    assert [row["parties"] for row in copied["extraction_results"]] == [["Acme"]]
+
+
+def test_keeps_newest_extraction_per_document(tmp_path, monkeypatch):
+    source = make_baseline_db(tmp_path / "source.db")
+    with source.begin() as conn:
+        conn.execute(text("UPDATE extraction_results SET created_at = '2024-01-01 00:00:00'"))
+        conn.execute(text(
+            "INSERT INTO extraction_results (id, document_id, parties, created_at) VALUES "
+            "('ext-2', 'doc-1', '[\"Newer\"]', '2024-06-01 00:00:00'), "
+            "('ext-3', 'doc-1', '[\"Undated\"]', NULL)"
+        ))
+    
+    copied = stream_tables(source, tmp_path, monkeypatch)
+    
+    assert [row["id"] for row in copied["extraction_results"]] == ["ext-2"]
+
+
+def test_unique_indexes_stay_during_load():
+    names = {index.name for index in migrate_to_postgres._secondary_indexes()}
+    assert "ix_extraction_results_document_id" not in names
+    assert "ix_documents_filename" in names
+
+
+def test_copy_field_encodes_bytes_as_bytea_hex():
+    assert _copy_field(b"PK\x03\x04", False) == '"\\x504b0304"'